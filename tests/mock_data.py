@@ -106,7 +106,7 @@ YELP_SEARCH_RESULTS = """
 """
 
 MOCKED_CSV_FILE_CONTENT = dedent("""\
-name,phone,address,zipcode,link,emails
-Monkey Wrench Bicycles,+15124672453,"5555 N Lamar Ste L131 Austin, TX 78751",78751,,❌
-Bicycle Sport Shop,+15124773472,"517 S Lamar Blvd Austin, TX 78704",78704,,❌
+name,phone,address,zipcode,link,emails,id
+Monkey Wrench Bicycles,+15124672453,"5555 N Lamar Ste L131 Austin, TX 78751",78751,,❌,WT_d47o-V5xlMNx8trI0-A
+Bicycle Sport Shop,+15124773472,"517 S Lamar Blvd Austin, TX 78704",78704,,❌,wfKxBxJ8RFZj8jOB6Lpn-Q
 """)
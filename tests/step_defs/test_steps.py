@@ -2,14 +2,16 @@
 import asyncio
 import json
 import os
+import re
 
+from aioresponses import aioresponses
 from faker import Faker
 import pytest
 from pytest_bdd import given
 from pytest_bdd import scenario
 from pytest_bdd import then
-from yelpapi import YelpAPI
 
+from yelper.core.search import SEARCH_URL
 from yelper.core.yelper import async_deep_query
 from tests import mock_data
 
@@ -43,10 +45,13 @@ def create_tmp_csv_file(tmp_path, scope='session'):
 async def research(mocker, create_tmp_csv_file):
     fake = Faker()
     mocker.patch.dict(os.environ, {"YELP_API_KEY": fake.pystr()})
-    mocker.patch.object(YelpAPI, '_query', side_effect=[json.loads(mock_data.YELP_SEARCH_RESULTS), {}])
-    mocker.patch('yelper.core.yelper.deep_link', return_value=async_mock(None), autospec=True)
+    mocker.patch('yelper.core.yelper.deep_link', new=lambda url, session, **kwargs: async_mock(None))
 
-    await async_deep_query('bike shops', 'Austin, TX', output=create_tmp_csv_file)
+    with aioresponses() as m:
+        search_url = re.compile(r'^' + re.escape(SEARCH_URL))
+        m.get(search_url, payload=json.loads(mock_data.YELP_SEARCH_RESULTS))
+        m.get(search_url, payload={})
+        await async_deep_query('bike shops', 'Austin, TX', output=create_tmp_csv_file)
 
 
 @then('the generated file contains the collected data')
@@ -0,0 +1,70 @@
+"""Test the batch module."""
+import json
+import os
+import re
+
+from aioresponses import aioresponses
+from aioresponses import CallbackResult
+import pytest
+
+from tests import mock_data
+from yelper.core.batch import async_batch_query
+from yelper.core.batch import job_output
+from yelper.core.search import SEARCH_URL
+
+JOBS = [
+    {
+        'terms': 'bike shops',
+        'location': 'Austin, TX'
+    },
+    {
+        'terms': 'bicycles',
+        'location': 'Austin, TX'
+    },
+]
+
+
+@pytest.fixture
+def search(mocker):
+    """Return the same search results for every job, and count the business pages scraped."""
+    mocker.patch.dict(os.environ, {'YELP_API_KEY': 'key'})
+    scraped = []
+
+    async def deep_link(url, session, **kwargs):
+        scraped.append(url)
+
+    mocker.patch('yelper.core.yelper.deep_link', new=deep_link)
+
+    def search_results(url, **kwargs):
+        first_page = kwargs['params']['offset'] == 0
+        return CallbackResult(payload=json.loads(mock_data.YELP_SEARCH_RESULTS) if first_page else {})
+
+    with aioresponses() as m:
+        m.get(re.compile(r'^' + re.escape(SEARCH_URL)), callback=search_results, repeat=True)
+        yield scraped
+
+
+def test_job_output():
+    """Ensure the job outputs default to a name derived from the query."""
+    assert job_output(JOBS[0]) == 'bike-shops-austin-tx.csv'
+    assert job_output({**JOBS[0], 'output': 'austin.csv'}) == 'austin.csv'
+
+
+@pytest.mark.asyncio
+async def test_batch_combined_output(tmp_path, search):
+    """Ensure the businesses found by several jobs are scraped and written once."""
+    output = tmp_path / 'combined.csv'
+    await async_batch_query(JOBS, output=str(output))
+    assert len(search) == 2
+    assert len(output.read_text().splitlines()) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_job_outputs(tmp_path, search):
+    """Ensure each job output contains all of its businesses."""
+    jobs = [{**job, 'output': str(tmp_path / f'{i}.csv')} for i, job in enumerate(JOBS)]
+    await async_batch_query(jobs)
+    assert len(search) == 2
+    for i in range(len(jobs)):
+        actual = (tmp_path / f'{i}.csv').read_text().splitlines()
+        assert sorted(actual) == sorted(mock_data.MOCKED_CSV_FILE_CONTENT.splitlines())
@@ -0,0 +1,68 @@
+"""Test the cache module."""
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.cache import ResponseCache
+from yelper.core.yelper import deep_emails
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a response cache in a temporary directory."""
+    c = ResponseCache.from_dir(str(tmp_path / 'cache'), ttl=60, max_size=100)
+    yield c
+    c.close()
+
+
+def test_get_set(cache):
+    """Ensure an entry can be stored and retrieved."""
+    cache.set('link', 'http://yelp.com/biz/a', 'http://a.com', etag='"abc"')
+    actual = cache.get('link', 'http://yelp.com/biz/a')
+    assert actual.value == 'http://a.com'
+    assert actual.etag == '"abc"'
+    assert actual.fresh
+    assert cache.get('emails', 'http://yelp.com/biz/a') is None
+
+
+def test_get_stale(cache):
+    """Ensure the entries older than the TTL are not fresh."""
+    cache.ttl = 0
+    cache.set('link', 'http://yelp.com/biz/a', 'http://a.com')
+    assert not cache.get('link', 'http://yelp.com/biz/a').fresh
+
+
+def test_evict(cache):
+    """Ensure the least recently used entries are evicted first."""
+    for name in 'abcd':
+        cache.set('link', f'http://yelp.com/biz/{name}', 'x' * 20)
+    cache.get('link', 'http://yelp.com/biz/a')
+    cache.evict()
+    assert cache.get('link', 'http://yelp.com/biz/a')
+    assert cache.get('link', 'http://yelp.com/biz/b') is None
+
+
+def test_conditional_headers(cache):
+    """Ensure the validators are turned into conditional headers."""
+    cache.set('emails', 'http://a.com', '', etag='"abc"', last_modified='Wed, 21 Oct 2015 07:28:00 GMT')
+    actual = ResponseCache.conditional_headers(cache.get('emails', 'http://a.com'))
+    assert actual == {'If-None-Match': '"abc"', 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    assert ResponseCache.conditional_headers(None) == {}
+
+
+@pytest.mark.asyncio
+async def test_deep_emails_revalidation(cache):
+    """Ensure a stale entry is revalidated instead of being downloaded again."""
+    url = 'http://example.com'
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get(url, body='contact: hello@example.com', headers={'ETag': '"v1"'})
+            m.get(url, status=304)
+            assert await deep_emails(url, session, cache=cache) == 'hello@example.com'
+            cache.ttl = 0
+            assert await deep_emails(url, session, cache=cache) == 'hello@example.com'
+            cache.ttl = 60
+            assert await deep_emails(url, session, cache=cache) == 'hello@example.com'
+            requests = [call for calls in m.requests.values() for call in calls]
+    assert len(requests) == 2
+    assert requests[1].kwargs['headers']['If-None-Match'] == '"v1"'
@@ -0,0 +1,55 @@
+"""Test the checkpoint module."""
+import pytest
+
+from yelper.core.checkpoint import Checkpoint
+from yelper.core.checkpoint import CheckpointError
+
+PARAMS = {'term': 'bike shops', 'location': 'Austin, TX', 'offset': 0, 'limit': 2, 'radius': 40000}
+
+
+def businesses(*ids):
+    """Create the businesses of a search page."""
+    return [{'id': i, 'name': i} for i in ids]
+
+
+def test_resume(tmp_path):
+    """Ensure a run resumes at the first incomplete page and skips the businesses already written."""
+    path = str(tmp_path / 'out.csv.checkpoint')
+    checkpoint = Checkpoint(path, limit=2)
+    checkpoint.start(dict(PARAMS))
+    checkpoint.page(0, businesses('a', 'b'))
+    checkpoint.page(2, businesses('c', 'd'))
+    for business in businesses('b', 'c', 'a'):
+        checkpoint.commit(business)
+    checkpoint.close()
+
+    resumed = Checkpoint(path, limit=2, resume=True)
+    params = dict(PARAMS)
+    resumed.start(params)
+    assert resumed.resumed
+    assert params['offset'] == 2
+    assert resumed.page(2, businesses('c', 'd')) == businesses('d')
+    resumed.close(complete=True)
+    assert not (tmp_path / 'out.csv.checkpoint').exists()
+
+
+def test_resume_another_search(tmp_path):
+    """Ensure a run cannot resume the checkpoint of another search."""
+    path = str(tmp_path / 'out.csv.checkpoint')
+    checkpoint = Checkpoint(path, limit=2)
+    checkpoint.start(dict(PARAMS))
+    checkpoint.close()
+
+    resumed = Checkpoint(path, limit=2, resume=True)
+    with pytest.raises(CheckpointError):
+        resumed.start({**PARAMS, 'location': 'Dallas, TX'})
+    resumed.close()
+
+
+def test_empty_page(tmp_path):
+    """Ensure a page with nothing left to process is complete right away."""
+    checkpoint = Checkpoint(str(tmp_path / 'journal'), limit=2)
+    checkpoint.start(dict(PARAMS))
+    checkpoint.page(0, [])
+    checkpoint.close()
+    assert 'offset 2\n' in (tmp_path / 'journal').read_text()
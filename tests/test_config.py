@@ -0,0 +1,51 @@
+"""Test the config module."""
+from textwrap import dedent
+
+import pytest
+
+from yelper import config
+
+
+def test_load_jobs_csv(tmp_path):
+    """Ensure the jobs can be loaded from a CSV file."""
+    jobs_file = tmp_path / 'jobs.csv'
+    jobs_file.write_text(
+        dedent("""\
+        terms,location,pages
+        bike shops,"Austin, TX",2
+        coffee,"Dallas, TX",
+        """))
+    actual = config.load_jobs(str(jobs_file))
+    assert actual == [
+        {
+            'terms': 'bike shops',
+            'location': 'Austin, TX',
+            'pages': 2
+        },
+        {
+            'terms': 'coffee',
+            'location': 'Dallas, TX'
+        },
+    ]
+
+
+def test_load_jobs_yaml(tmp_path):
+    """Ensure the jobs can be loaded from a YAML file."""
+    jobs_file = tmp_path / 'jobs.yml'
+    jobs_file.write_text(
+        dedent("""\
+        jobs:
+          - terms: bike shops
+            location: Austin, TX
+            output: austin.csv
+        """))
+    actual = config.load_jobs(str(jobs_file))
+    assert actual == [{'terms': 'bike shops', 'location': 'Austin, TX', 'output': 'austin.csv'}]
+
+
+def test_load_jobs_invalid(tmp_path):
+    """Ensure the jobs without location are rejected."""
+    jobs_file = tmp_path / 'jobs.yml'
+    jobs_file.write_text('jobs:\n  - terms: bike shops\n')
+    with pytest.raises(SyntaxError):
+        config.load_jobs(str(jobs_file))
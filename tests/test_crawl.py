@@ -0,0 +1,61 @@
+"""Test the crawl module."""
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.crawl import Crawler
+from yelper.core.crawl import same_domain
+from yelper.core.crawl import score_link
+
+HOME_PAGE = b"""<html><body>
+<a href="/blog">Blog</a>
+<a href="/private/contact">Private contact</a>
+<a href="/about-us">About us</a>
+<a href="https://facebook.com/contact">Facebook</a>
+<a href="/contact#form">Contact</a>
+</body></html>"""
+
+
+def test_score_link():
+    """Ensure the contact pages rank higher than the other pages."""
+    assert score_link('http://a.com/contact', 'Reach us') > score_link('http://a.com/about', 'About')
+    assert score_link('http://a.com/blog', 'Blog') == 0
+
+
+def test_same_domain():
+    """Ensure the `www.` prefix is ignored."""
+    assert same_domain('http://www.a.com/', 'https://a.com/contact')
+    assert not same_domain('http://a.com/', 'http://b.com/contact')
+
+
+@pytest.mark.asyncio
+async def test_crawl():
+    """Ensure the crawl follows the best links allowed and stops once emails are found."""
+    async with aiohttp.ClientSession() as session:
+        crawler = Crawler(session)
+        with aioresponses() as m:
+            m.get('http://a.com', body=HOME_PAGE, content_type='text/html')
+            m.get('http://a.com/robots.txt', body='User-agent: *\nDisallow: /private/\n')
+            m.get('http://a.com/contact', body=b'<p>hello@a.com</p>', content_type='text/html')
+            m.get('http://a.com/about-us', body=b'<p>about@a.com</p>', content_type='text/html')
+            actual = await crawler.crawl('http://a.com')
+            requested = [str(url) for _, url in m.requests]
+    assert actual == {'hello@a.com'}
+    assert 'http://a.com/about-us' not in requested
+    assert 'http://a.com/private/contact' not in requested
+
+
+@pytest.mark.asyncio
+async def test_crawl_budget():
+    """Ensure the crawl stops once the budget of the run is exhausted."""
+    async with aiohttp.ClientSession() as session:
+        crawler = Crawler(session, budget=1)
+        with aioresponses() as m:
+            m.get('http://a.com', body=HOME_PAGE, content_type='text/html', repeat=True)
+            m.get('http://a.com/robots.txt', status=404)
+            m.get('http://a.com/contact', body=b'<p>nothing</p>', content_type='text/html', repeat=True)
+            assert await crawler.crawl('http://a.com') == set()
+            assert await crawler.crawl('http://a.com') == set()
+            requested = [str(url) for _, url in m.requests]
+    assert requested.count('http://a.com/contact') == 1
+    assert crawler.budget == 0
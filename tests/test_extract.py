@@ -0,0 +1,83 @@
+"""Test the extract module."""
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.extract import EmailExtractor
+from yelper.core.extract import LinkExtractor
+from yelper.core.yelper import deep_emails
+from yelper.core.yelper import deep_link
+
+BIZ_PAGE = (b'<html><body><div class="header">' + b'<a href="/x">x</a>' * 100 +
+            b'<span class="biz-website js-add-url-tagging">Business website '
+            b'<a href="/biz_redir?url=http%3A%2F%2Fwww.monkeywrenchbicycles.com&amp;website_link_type=website">'
+            b'monkeywrenchbicycles.com</a></span></div>' + b'<p>filler</p>' * 1000 + b'</body></html>')
+
+
+def test_link_extractor_chunks():
+    """Ensure the link is found even when split across chunks."""
+    extractor = LinkExtractor()
+    chunks = [BIZ_PAGE[i:i + 7] for i in range(0, len(BIZ_PAGE), 7)]
+    found = [extractor.feed(chunk) for chunk in chunks]
+    assert any(found)
+    assert found.index(True) < len(chunks) // 2
+    assert extractor.result.startswith('/biz_redir?url=')
+
+
+def test_link_extractor_missing():
+    """Ensure nothing is found on a page without website."""
+    extractor = LinkExtractor()
+    assert not extractor.feed(b'<html><body><span class="biz-phone"><a href="tel:1">1</a></span></body></html>')
+    assert extractor.close() is None
+
+
+@pytest.mark.asyncio
+async def test_deep_link():
+    """Ensure the website is extracted from the business page."""
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('https://www.yelp.com/biz/a', body=BIZ_PAGE)
+            actual = await deep_link('https://www.yelp.com/biz/a', session)
+    assert actual == 'http://www.monkeywrenchbicycles.com'
+
+
+@pytest.mark.asyncio
+async def test_deep_link_max_bytes():
+    """Ensure the download stops after the maximum number of bytes."""
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('https://www.yelp.com/biz/a', body=BIZ_PAGE)
+            actual = await deep_link('https://www.yelp.com/biz/a', session, max_bytes=1024)
+    assert actual == '❌'
+
+
+def test_email_extractor_boundaries():
+    """Ensure the email addresses spanning several chunks are found entirely."""
+    page = ('<p>' + 'x ' * 500 + 'contact: hello.world@example.com, sales@example.org</p>').encode()
+    for size in (1, 5, 64, 4096):
+        extractor = EmailExtractor()
+        for i in range(0, len(page), size):
+            extractor.feed(page[i:i + size])
+        assert extractor.close() == {'hello.world@example.com', 'sales@example.org'}
+
+
+def test_email_extractor_charset():
+    """Ensure the chunks are decoded with the charset of the page, even when a character is split."""
+    page = 'José <josé@example.com> jose@example.com'.encode('latin-1')
+    extractor = EmailExtractor('latin-1')
+    for i in range(len(page)):
+        extractor.feed(page[i:i + 1])
+    assert extractor.close() == {'jose@example.com', 'josé@example.com'}
+
+
+@pytest.mark.asyncio
+async def test_deep_emails_skips_binaries():
+    """Ensure the responses which cannot contain text are not scanned."""
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('http://example.com/menu.pdf', body=b'hello@example.com', content_type='application/pdf')
+            m.get('http://example.com', body=b'hello@example.com', content_type='text/html')
+            assert await deep_emails('http://example.com/menu.pdf', session) == '😑'
+            assert await deep_emails('http://example.com', session) == 'hello@example.com'
+            ((_, _), calls), _ = m.requests.items()
+    assert 'gzip' in calls[0].kwargs['headers']['Accept-Encoding']
@@ -0,0 +1,77 @@
+"""Test the pipeline module."""
+import asyncio
+
+import pytest
+
+from yelper.core.pipeline import merge
+from yelper.core.pipeline import Pipeline
+
+
+async def source(count):
+    """Produce `count` items."""
+    for i in range(count):
+        yield i
+
+
+async def slow_first(item):
+    """Process the first item slower than the others."""
+    await asyncio.sleep(0.05 if item == 0 else 0)
+    return item * 10
+
+
+@pytest.mark.asyncio
+async def test_stream_unordered():
+    """Ensure the results are emitted as soon as they complete."""
+    pipeline = Pipeline(slow_first, workers=4, queue_size=4)
+    actual = [result async for result in pipeline.stream(source(10))]
+    assert sorted(actual) == [i * 10 for i in range(10)]
+    assert actual[-1] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_ordered():
+    """Ensure the results can be emitted in the order of the source."""
+    pipeline = Pipeline(slow_first, workers=4, queue_size=4, ordered=True)
+    actual = [result async for result in pipeline.stream(source(10))]
+    assert actual == [i * 10 for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_stream_backpressure():
+    """Ensure the number of items in flight is bounded."""
+    in_flight = []
+    produced = 0
+
+    async def counting_source():
+        nonlocal produced
+        for i in range(20):
+            produced += 1
+            yield i
+
+    async def process(item):
+        await asyncio.sleep(0)
+        return item
+
+    async for _ in Pipeline(process, workers=2, queue_size=3).stream(counting_source()):
+        in_flight.append(produced)
+        await asyncio.sleep(0.01)
+    assert max(in_flight) - len(in_flight) <= 4
+
+
+@pytest.mark.asyncio
+async def test_stream_error():
+    """Ensure a failing worker stops the pipeline."""
+
+    async def fail(item):
+        raise ValueError(item)
+
+    with pytest.raises(ValueError):
+        async for _ in Pipeline(fail, workers=2).stream(source(5)):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_merge():
+    """Ensure the items of all the sources are produced."""
+    actual = [item async for item in merge(source(3), source(2))]
+    assert sorted(actual) == [0, 0, 1, 1, 2]
@@ -0,0 +1,45 @@
+"""Test the pool module."""
+import asyncio
+
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.extract import extract_emails
+from yelper.core.pool import ParsePool
+from yelper.core.pool import run_batch
+from yelper.core.yelper import deep_emails
+
+
+def test_run_batch():
+    """Ensure the errors of a job do not affect the others."""
+    actual = run_batch([(int, ('1', )), (int, ('x', ))])
+    assert actual[0] == (None, 1)
+    assert isinstance(actual[1][0], ValueError)
+
+
+@pytest.fixture
+def pool():
+    """Create a pool with a single worker process."""
+    p = ParsePool(1, batch_size=4)
+    yield p
+    p.close()
+
+
+@pytest.mark.asyncio
+async def test_parse_pool(pool):
+    """Ensure the calls are batched and their results dispatched."""
+    pages = [f'contact{i}@example.com'.encode() for i in range(10)]
+    actual = await asyncio.gather(*[pool.run(extract_emails, page) for page in pages])
+    assert actual == [{f'contact{i}@example.com'} for i in range(10)]
+    with pytest.raises(ValueError):
+        await pool.run(int, 'x')
+
+
+@pytest.mark.asyncio
+async def test_deep_emails_pool(pool):
+    """Ensure the pages can be scanned by the pool."""
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('http://example.com', body=b'hello@example.com', content_type='text/html')
+            assert await deep_emails('http://example.com', session, pool=pool) == 'hello@example.com'
@@ -0,0 +1,85 @@
+"""Test the ratelimit module."""
+import asyncio
+
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.ratelimit import AdaptiveConcurrency
+from yelper.core.ratelimit import Limiter
+from yelper.core.ratelimit import parse_retry_after
+from yelper.core.ratelimit import TokenBucket
+
+
+def test_parse_retry_after():
+    """Ensure both formats of the `Retry-After` header are supported."""
+    assert parse_retry_after('3') == 3
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_adaptive_concurrency():
+    """Ensure the limit increases additively and decreases multiplicatively."""
+    limiter = AdaptiveConcurrency(initial=4, maximum=8)
+    for _ in range(4):
+        limiter.success()
+    assert 4.9 < limiter.limit < 5
+    limiter.failure()
+    assert 2.4 < limiter.limit < 2.5
+    for _ in range(10):
+        limiter.failure()
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_slots():
+    """Ensure no more requests than the limit are in flight."""
+    limiter = AdaptiveConcurrency(initial=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    limiter.release()
+    await asyncio.sleep(0)
+    assert waiting.done()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket():
+    """Ensure the requests beyond the burst are delayed."""
+    bucket = TokenBucket(rate=100, burst=1)
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    for _ in range(3):
+        await bucket.acquire()
+    assert loop.time() - start >= 0.015
+
+
+@pytest.mark.asyncio
+async def test_limiter_retries():
+    """Ensure the throttled requests are retried, honoring `Retry-After`."""
+    limiter = Limiter(concurrency=4, retries=2)
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('http://example.com', status=429, headers={'Retry-After': '0'})
+            m.get('http://example.com', status=503, headers={'Retry-After': '0'})
+            m.get('http://example.com', body='ok')
+            async with limiter.request(session, 'GET', 'http://example.com') as response:
+                assert await response.text() == 'ok'
+    assert limiter.concurrency.limit < 4
+    assert limiter.concurrency.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_gives_up():
+    """Ensure the requests still throttled after the last retry fail."""
+    limiter = Limiter(retries=1, backoff=0)
+    async with aiohttp.ClientSession() as session:
+        with aioresponses() as m:
+            m.get('http://example.com', status=429, repeat=True)
+            with pytest.raises(aiohttp.ClientResponseError):
+                async with limiter.request(session, 'GET', 'http://example.com'):
+                    pass
+    assert limiter.concurrency.in_flight == 0
@@ -0,0 +1,41 @@
+"""Test the search module."""
+import re
+
+from aioresponses import aioresponses
+import aiohttp
+import pytest
+
+from yelper.core.search import SEARCH_URL
+from yelper.core.search import YelpSearchClient
+from yelper.core.search import YelpSearchError
+
+
+@pytest.mark.asyncio
+async def test_search_query():
+    """Ensure the search parameters and the API key are sent."""
+    async with aiohttp.ClientSession() as session:
+        client = YelpSearchClient('key', session)
+        with aioresponses() as m:
+            m.get(re.compile(r'^' + re.escape(SEARCH_URL)), payload={'businesses': [], 'total': 0})
+            actual = await client.search_query(term='bike shops', location='Austin, TX', offset=0, limit=20)
+            ((_, url), calls), = m.requests.items()
+    assert actual == {'businesses': [], 'total': 0}
+    assert url.query['term'] == 'bike shops'
+    assert url.query['limit'] == '20'
+    assert calls[0].kwargs['headers']['Authorization'] == 'Bearer key'
+
+
+@pytest.mark.asyncio
+async def test_search_query_error():
+    """Ensure the API errors are raised."""
+    async with aiohttp.ClientSession() as session:
+        client = YelpSearchClient('key', session)
+        with aioresponses() as m:
+            m.get(re.compile(r'^' + re.escape(SEARCH_URL)),
+                  status=400,
+                  payload={'error': {
+                      'code': 'VALIDATION_ERROR',
+                      'description': 'Too many results requested'
+                  }})
+            with pytest.raises(YelpSearchError):
+                await client.search_query(term='bike shops', location='Austin, TX', offset=1000)
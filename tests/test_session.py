@@ -0,0 +1,13 @@
+"""Test the session module."""
+import pytest
+
+from yelper.core import session
+
+
+@pytest.mark.asyncio
+async def test_create_session():
+    """Ensure the session connector is configured for connection pooling."""
+    async with session.create_session(concurrency=42, per_host=4, dns_ttl=60) as s:
+        assert s.connector.limit == 42
+        assert s.connector.limit_per_host == 4
+        assert s.connector.use_dns_cache
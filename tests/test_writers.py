@@ -0,0 +1,88 @@
+"""Test the writers module."""
+import json
+import sqlite3
+
+import pytest
+
+from yelper.core.writers import create_writer
+from yelper.core.writers import CsvWriter
+from yelper.core.writers import JsonLinesWriter
+from yelper.core.writers import SqliteWriter
+
+FIELDNAMES = ('name', 'emails', 'id')
+ROWS = [('Monkey Wrench Bicycles', '', 'a'), ('Bicycle Sport Shop', 'info@bss.com', 'b')]
+
+
+def test_csv_writer_appends(tmp_path):
+    """Ensure the CSV header is only written to a new file."""
+    path = tmp_path / 'out.csv'
+    for append in (False, True):
+        writer = CsvWriter(str(path), FIELDNAMES, append=append)
+        writer.write_batch(ROWS)
+        writer.close()
+    assert path.read_text().splitlines() == [
+        'name,emails,id',
+        'Monkey Wrench Bicycles,,a',
+        'Bicycle Sport Shop,info@bss.com,b',
+        'Monkey Wrench Bicycles,,a',
+        'Bicycle Sport Shop,info@bss.com,b',
+    ]
+
+
+def test_jsonl_writer(tmp_path):
+    """Ensure each row is written as a JSON object."""
+    path = tmp_path / 'out.jsonl'
+    writer = JsonLinesWriter(str(path), FIELDNAMES)
+    writer.write_batch(ROWS)
+    writer.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [dict(zip(FIELDNAMES, row)) for row in ROWS]
+
+
+def test_sqlite_writer_upserts(tmp_path):
+    """Ensure the businesses are keyed by id, and the businesses without id are all kept."""
+    path = tmp_path / 'out.sqlite'
+    writer = SqliteWriter(str(path), FIELDNAMES)
+    writer.write_batch(ROWS + [('Monkey Wrench Bicycles', 'mwb@mwb.com', 'a'), ('x', '', ''), ('y', '', '')])
+    writer.close()
+    db = sqlite3.connect(str(path))
+    rows = db.execute('SELECT name, emails, id FROM businesses ORDER BY name').fetchall()
+    assert rows == [
+        ('Bicycle Sport Shop', 'info@bss.com', 'b'),
+        ('Monkey Wrench Bicycles', 'mwb@mwb.com', 'a'),
+        ('x', '', None),
+        ('y', '', None),
+    ]
+
+
+def test_parquet_writer(tmp_path):
+    """Ensure the rows are written to a Parquet file."""
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'out.parquet'
+    writer = create_writer(str(path), FIELDNAMES, 'parquet')
+    writer.writer.write_batch(ROWS)
+    writer.writer.close()
+    assert parquet.read_table(str(path)).to_pylist() == [dict(zip(FIELDNAMES, row)) for row in ROWS]
+
+
+@pytest.mark.asyncio
+async def test_threaded_writer(tmp_path):
+    """Ensure the rows are written by batches, and their callbacks run once they are flushed."""
+    path = tmp_path / 'out.csv'
+    writer = create_writer(str(path), FIELDNAMES, batch_size=2, flush_interval=60, fsync=True)
+    flushed = []
+    for row in ROWS * 2:
+        await writer.write(row, lambda row=row: flushed.append(row[2]))
+    await writer.close()
+    assert flushed == ['a', 'b', 'a', 'b']
+    assert len(path.read_text().splitlines()) == 5
+
+
+@pytest.mark.asyncio
+async def test_threaded_writer_error(tmp_path):
+    """Ensure the errors of the writer thread are raised on the event loop."""
+    writer = create_writer(str(tmp_path / 'out.jsonl'), FIELDNAMES, 'jsonl')
+    await writer.write((object(), '', 'a'))
+    await writer.write(ROWS[0])
+    with pytest.raises(TypeError):
+        await writer.close()
@@ -8,6 +8,24 @@ from loguru import logger
 
 from yelper import config
 from yelper.cli.base import AbstractCommand
+from yelper.core import session as yelper_session
+from yelper.core.batch import deep_batch_query
+from yelper.core.cache import DEFAULT_TTL
+from yelper.core.crawl import DEFAULT_BUDGET
+from yelper.core.crawl import DEFAULT_MAX_DEPTH
+from yelper.core.crawl import DEFAULT_MAX_PAGES
+from yelper.core.crawl import DEFAULT_PER_DOMAIN
+from yelper.core.extract import DEFAULT_MAX_PAGE_SIZE
+from yelper.core.pipeline import DEFAULT_QUEUE_SIZE
+from yelper.core.pipeline import DEFAULT_WORKERS
+from yelper.core.ratelimit import DEFAULT_RETRIES
+from yelper.core.ratelimit import DEFAULT_SEARCH_RATE
+from yelper.core.ratelimit import DEFAULT_WEB_RATE
+from yelper.core.ratelimit import DEFAULT_YELP_RATE
+from yelper.core.writers import DEFAULT_BATCH_SIZE
+from yelper.core.writers import DEFAULT_FLUSH_INTERVAL
+from yelper.core.writers import DEFAULT_FORMAT
+from yelper.core.writers import WRITERS
 from yelper.core.version import detect_from_metadata
 from yelper.core.yelper import deep_query
 
@@ -62,22 +80,183 @@ def cli(ctx, verbose):
     logger.add(sys.stdout, format=log_format, level=log_level, colorize=True)
 
 
+def run_options(f):
+    """Add the options configuring the resources of a run."""
+    options = [
+        click.option('--concurrency',
+                     default=yelper_session.DEFAULT_CONCURRENCY,
+                     help='maximum number of simultaneous connections',
+                     show_default=True),
+        click.option('--per-host',
+                     default=yelper_session.DEFAULT_PER_HOST,
+                     help='maximum number of simultaneous connections per host',
+                     show_default=True),
+        click.option('--dns-ttl',
+                     default=yelper_session.DEFAULT_DNS_TTL,
+                     help='DNS cache lifetime (in seconds)',
+                     show_default=True),
+        click.option('--keepalive',
+                     default=yelper_session.DEFAULT_KEEPALIVE,
+                     help='idle connection lifetime (in seconds)',
+                     show_default=True),
+        click.option('--workers',
+                     default=DEFAULT_WORKERS,
+                     help='number of businesses processed concurrently',
+                     show_default=True),
+        click.option('--queue-size',
+                     default=DEFAULT_QUEUE_SIZE,
+                     help='maximum number of businesses in flight',
+                     show_default=True),
+        click.option('--cache-dir',
+                     default=os.path.join(click.get_app_dir(APP_NAME), 'cache'),
+                     help='directory of the response cache',
+                     show_default=True),
+        click.option('--cache-ttl',
+                     default=DEFAULT_TTL,
+                     help='lifetime of the cached responses (in seconds)',
+                     show_default=True),
+        click.option('--no-cache', is_flag=True, help='disable the response cache'),
+        click.option('--search-rate',
+                     default=DEFAULT_SEARCH_RATE,
+                     type=float,
+                     help='maximum number of searches per second (0 for no limit)',
+                     show_default=True),
+        click.option('--yelp-rate',
+                     default=DEFAULT_YELP_RATE,
+                     type=float,
+                     help='maximum number of Yelp business pages per second (0 for no limit)',
+                     show_default=True),
+        click.option('--web-rate',
+                     default=DEFAULT_WEB_RATE,
+                     type=float,
+                     help='maximum number of business websites per second (0 for no limit)',
+                     show_default=True),
+        click.option('--retries',
+                     default=DEFAULT_RETRIES,
+                     help='maximum number of retries per request',
+                     show_default=True),
+        click.option('--max-page-size',
+                     default=DEFAULT_MAX_PAGE_SIZE,
+                     help='maximum number of bytes downloaded per page',
+                     show_default=True),
+        click.option('--parse-workers',
+                     default=0,
+                     help='number of processes parsing the pages (0 to parse them in the main process)',
+                     show_default=True),
+        click.option('--crawl/--no-crawl',
+                     default=False,
+                     help='crawl the contact pages of the business websites',
+                     show_default=True),
+        click.option('--crawl-pages',
+                     default=DEFAULT_MAX_PAGES,
+                     help='maximum number of pages crawled per business',
+                     show_default=True),
+        click.option('--crawl-depth',
+                     default=DEFAULT_MAX_DEPTH,
+                     help='maximum number of links followed from the home page',
+                     show_default=True),
+        click.option('--crawl-per-domain',
+                     default=DEFAULT_PER_DOMAIN,
+                     help='maximum number of simultaneous requests per crawled domain',
+                     show_default=True),
+        click.option('--crawl-budget',
+                     default=DEFAULT_BUDGET,
+                     help='maximum number of pages followed during the run (0 for no limit)',
+                     show_default=True),
+        click.option('--format',
+                     'output_format',
+                     default=DEFAULT_FORMAT,
+                     type=click.Choice(list(WRITERS)),
+                     help='format of the output (parquet requires pyarrow)',
+                     show_default=True),
+        click.option('--flush-rows',
+                     default=DEFAULT_BATCH_SIZE,
+                     help='maximum number of businesses written per batch',
+                     show_default=True),
+        click.option('--flush-interval',
+                     default=DEFAULT_FLUSH_INTERVAL,
+                     help='maximum delay before a business gets written (in seconds)',
+                     show_default=True),
+        click.option('--fsync/--no-fsync', default=False, help='synchronize each batch to the disk', show_default=True),
+    ]
+    for option in reversed(options):
+        f = option(f)
+    return f
+
+
 @click.command()
 @click.option('--offset', default=0, help='offset the list of results by this amount', show_default=True)
 @click.option('--limit', default=25, help='maximum number of results per page', show_default=True)
 @click.option('--radius', default=40000, help='search radius (in meters)', show_default=True)
-@click.option('--output', default='yelper.csv', help='filename to store the results', show_default=True)
+@click.option('--output', help='filename to store the results  [default: yelper.<format>]')
 @click.option('--pages', default=0, help='number of result pages', show_default=True)
+@click.option('--ordered/--unordered',
+              default=False,
+              help='preserve the order of the search results',
+              show_default=True)
+@click.option('--resume', is_flag=True, help='resume the interrupted run writing to the output file')
+@run_options
 @click.argument('terms')
 @click.argument('location')
 @click.pass_context
-def retrieve(ctx, location, offset, limit, radius, output, pages, terms):
+def retrieve(ctx, location, offset, limit, radius, output, pages, ordered, resume, terms, **kwargs):
     """Retrieve information from Yelp."""
     command = Retrieve(ctx.params, ctx.obj)
     command.execute()
 
 
-class Retrieve(AbstractCommand):
+@click.command('retrieve-batch')
+@click.option('--output', help='filename to store the results of all the jobs, instead of one file per job')
+@run_options
+@click.argument('jobs', type=click.Path(exists=True, dir_okay=False))
+@click.pass_context
+def retrieve_batch(ctx, output, jobs, **kwargs):
+    """Retrieve information from Yelp for all the queries of a jobs file (CSV, YAML, JSON)."""
+    command = RetrieveBatch(ctx.params, ctx.obj)
+    command.execute()
+
+
+class RunCommand(AbstractCommand):
+    """Base class for the commands performing a run."""
+
+    RUN_OPTIONS = (
+        'concurrency',
+        'per_host',
+        'dns_ttl',
+        'keepalive',
+        'workers',
+        'queue_size',
+        'cache_dir',
+        'cache_ttl',
+        'search_rate',
+        'yelp_rate',
+        'web_rate',
+        'retries',
+        'max_page_size',
+        'parse_workers',
+        'crawl',
+        'crawl_pages',
+        'crawl_depth',
+        'crawl_per_domain',
+        'crawl_budget',
+    )
+    WRITER_OPTIONS = (
+        'flush_rows',
+        'flush_interval',
+        'fsync',
+    )
+
+    def run_options(self):
+        """Collect the options configuring the resources and the output of the run."""
+        options = {k: self.args[k] for k in self.RUN_OPTIONS}
+        if self.args['no_cache']:
+            options['cache_dir'] = None
+        options['output_format'] = self.args['output_format']
+        options['writer_options'] = {k: self.args[k] for k in self.WRITER_OPTIONS}
+        return options
+
+
+class Retrieve(RunCommand):
     """Retrieve information from Yelp."""
 
     def _execute(self):
@@ -90,7 +269,19 @@ class Retrieve(AbstractCommand):
             self.args['radius'],
             self.args['output'],
             self.args['pages'],
+            ordered=self.args['ordered'],
+            resume=self.args['resume'],
+            **self.run_options(),
         )
 
 
+class RetrieveBatch(RunCommand):
+    """Retrieve information from Yelp for several queries."""
+
+    def _execute(self):
+        """Define the internal execution of the command."""
+        deep_batch_query(config.load_jobs(self.args['jobs']), self.args['output'], **self.run_options())
+
+
 cli.add_command(retrieve)
+cli.add_command(retrieve_batch)
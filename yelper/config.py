@@ -1,4 +1,6 @@
 """Define the anyconfig configuration."""
+import csv
+
 import anyconfig
 
 CONFIGURATION_DEFAULTS = {'hello': {'name': 'stranger'}}
@@ -47,3 +49,76 @@ def load(path=None, with_defaults=False, validate=False):
             raise SyntaxError(err)
 
     return conf
+
+
+JOB_SCHEMA = {
+    'type': 'object',
+    'required': ['terms', 'location'],
+    'properties': {
+        'terms': {
+            'type': 'string'
+        },
+        'location': {
+            'type': 'string'
+        },
+        'offset': {
+            'type': 'integer'
+        },
+        'limit': {
+            'type': 'integer'
+        },
+        'radius': {
+            'type': 'integer'
+        },
+        'pages': {
+            'type': 'integer'
+        },
+        'output': {
+            'type': 'string'
+        },
+    }
+}
+
+JOBS_SCHEMA = {
+    'type': 'object',
+    'required': ['jobs'],
+    'properties': {
+        'jobs': {
+            'type': 'array',
+            'items': JOB_SCHEMA,
+        }
+    }
+}
+
+# Columns of a CSV jobs file holding integers.
+JOB_INTEGER_FIELDS = ('offset', 'limit', 'radius', 'pages')
+
+
+def load_jobs(path):
+    """
+    Load a jobs file.
+
+    A jobs file lists the queries of a batch, either as a CSV file with a header, or as any configuration format
+    supported by `anyconfig` (YAML, JSON, etc.) with a top-level `jobs` list. Each job defines at least the `terms`
+    and the `location` of the query.
+
+    :param str path: jobs file path
+    :returns: (list) A list of dictionaries representing the jobs.
+    :raises SyntaxError: if the jobs file is invalid.
+    """
+    if str(path).endswith('.csv'):
+        with open(path, newline='') as csvfile:
+            jobs = [{k: v for k, v in row.items() if v} for row in csv.DictReader(csvfile)]
+        for job in jobs:
+            for field in JOB_INTEGER_FIELDS:
+                if field in job:
+                    job[field] = int(job[field])
+        conf = {'jobs': jobs}
+    else:
+        conf = anyconfig.load(path)
+
+    (rc, err) = anyconfig.validate(conf, JOBS_SCHEMA)
+    if not rc:
+        raise SyntaxError(err)
+
+    return conf['jobs']
@@ -0,0 +1,123 @@
+"""Define the batch queries."""
+import asyncio
+import contextlib
+import re
+
+from yelper.core.pipeline import DEFAULT_QUEUE_SIZE
+from yelper.core.pipeline import DEFAULT_WORKERS
+from yelper.core.pipeline import merge
+from yelper.core.pipeline import Pipeline
+from yelper.core.writers import DEFAULT_FORMAT
+from yelper.core.writers import WRITERS
+from yelper.core.yelper import entry_row
+from yelper.core.yelper import open_resources
+from yelper.core.yelper import open_writer
+from yelper.core.yelper import parse_entry
+from yelper.core.yelper import search_businesses
+
+# Default values of the job parameters.
+JOB_DEFAULTS = {'offset': 0, 'limit': 25, 'radius': 40000, 'pages': 0}
+
+
+def job_output(job, output_format=DEFAULT_FORMAT):
+    """
+    Name the output file of a job.
+
+    :param dict job: the job
+    :param str output_format: format of the output
+    :returns: (str) the `output` of the job if defined, otherwise a file name derived from its terms and location.
+    """
+    if job.get('output'):
+        return job['output']
+    slug = re.sub(r'[^a-z0-9]+', '-', f"{job['terms']} {job['location']}".lower()).strip('-')
+    return f'{slug}.{WRITERS[output_format].extension}'
+
+
+async def _tag(index, source):
+    """Tag the items of a source with the index of their job."""
+    async for item in source:
+        yield index, item
+
+
+async def async_batch_query(jobs,
+                            output=None,
+                            workers=DEFAULT_WORKERS,
+                            queue_size=DEFAULT_QUEUE_SIZE,
+                            output_format=DEFAULT_FORMAT,
+                            writer_options=None,
+                            **kwargs):
+    """
+    Run several queries at once.
+
+    The queries are searched concurrently and share the resources of the run, including the pool of workers, which
+    defines the global concurrency budget. A business found by several queries is only deep-scraped once.
+
+    The extra keyword arguments configure the resources of the run (see `open_resources`).
+
+    :param list jobs: jobs defining the queries (see `yelper.config.load_jobs`)
+    :param str output: if set, all the businesses are written once to this file, otherwise each job writes its
+        businesses to its own file (see `job_output`).
+    :param int workers: number of businesses processed concurrently
+    :param int queue_size: maximum number of businesses in flight
+    :param str output_format: format of the outputs
+    :param dict writer_options: settings of the batches of the writers (see `open_writer`)
+    """
+    async with contextlib.AsyncExitStack() as stack:
+        resources = await open_resources(stack, **kwargs)
+
+        # Prepare the outputs.
+        writer_options = writer_options or {}
+        if output:
+            outputs = [open_writer(stack, output, output_format, **writer_options)] * len(jobs)
+        else:
+            outputs = [
+                open_writer(stack, job_output(job, output_format), output_format, **writer_options) for job in jobs
+            ]
+
+        # Prepare the searches of all the jobs.
+        sources = []
+        for index, job in enumerate(jobs):
+            job = {**JOB_DEFAULTS, **job}
+            params = {
+                'term': job['terms'],
+                'location': job['location'],
+                'offset': job['offset'],
+                'limit': job['limit'],
+                'radius': job['radius'],
+            }
+            sources.append(_tag(index, search_businesses(resources.yelp_api, params, job['pages'])))
+
+        # Prepare the pipeline digging deeper into each business, only once per business.
+        scraped = {}
+
+        async def process(item):
+            index, (counter, business) = item
+            business_id = business.get('id')
+
+            # With a combined output, the duplicates are simply skipped.
+            if business_id in scraped:
+                return index, None if output else await scraped[business_id]
+
+            future = asyncio.get_event_loop().create_future()
+            if business_id:
+                scraped[business_id] = future
+            try:
+                entry = await parse_entry(business, counter, resources)
+            except BaseException:
+                future.cancel()
+                raise
+            future.set_result(entry)
+            return index, entry
+
+        pipeline = Pipeline(process, workers=workers, queue_size=queue_size)
+
+        # Search Yelp and write the entries to the files as soon as they are complete.
+        async for index, entry in pipeline.stream(merge(*sources, queue_size=queue_size)):
+            if entry is None:
+                continue
+            await outputs[index].write(entry_row(entry))
+
+
+def deep_batch_query(jobs, output=None, **kwargs):
+    """Run several queries at once (see `async_batch_query`)."""
+    asyncio.run(async_batch_query(jobs, output=output, **kwargs))
@@ -0,0 +1,148 @@
+"""Define the persistent cache of the parsed responses."""
+import collections
+import os
+import sqlite3
+import time
+
+# Default cache settings.
+DEFAULT_CACHE_FILE = 'cache.sqlite'
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Number of writes between two evictions.
+EVICTION_INTERVAL = 1000
+
+CacheEntry = collections.namedtuple('CacheEntry', ['value', 'etag', 'last_modified', 'fresh'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    stage TEXT NOT NULL,
+    url TEXT NOT NULL,
+    value TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (stage, url)
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """
+    Store the results extracted from the HTTP responses in a SQLite file.
+
+    The entries are keyed by stage (i.e. `link` or `emails`) and URL. They are considered fresh for `ttl` seconds.
+    Past that, the validators of the response (`ETag` and `Last-Modified`) can be used to revalidate them. The least
+    recently used entries are evicted once the total size of the cached values exceeds `max_size` bytes.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        """
+        Initialize the cache.
+
+        :param str path: path of the SQLite file. Its parent directory is created if needed.
+        :param int ttl: number of seconds an entry is considered fresh
+        :param int max_size: maximum total size of the cached values (in bytes)
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def from_dir(cls, cache_dir, **kwargs):
+        """Create a `ResponseCache` using the default file of the `cache_dir` directory."""
+        return cls(os.path.join(cache_dir, DEFAULT_CACHE_FILE), **kwargs)
+
+    def get(self, stage, url):
+        """
+        Retrieve an entry.
+
+        Stale entries are returned as well, to allow their revalidation.
+
+        :param str stage: stage which produced the value
+        :param str url: URL of the response
+        :returns: (CacheEntry) the cached entry, or `None` if there is none.
+        """
+        row = self.db.execute(
+            'SELECT value, etag, last_modified, stored_at FROM responses WHERE stage = ? AND url = ?',
+            (stage, url),
+        ).fetchone()
+        if not row:
+            return None
+
+        now = time.time()
+        self.db.execute('UPDATE responses SET accessed_at = ? WHERE stage = ? AND url = ?', (now, stage, url))
+        value, etag, last_modified, stored_at = row
+        return CacheEntry(value, etag, last_modified, now - stored_at < self.ttl)
+
+    def set(self, stage, url, value, etag=None, last_modified=None):
+        """
+        Store an entry.
+
+        :param str stage: stage which produced the value
+        :param str url: URL of the response
+        :param str value: value extracted from the response
+        :param str etag: `ETag` header of the response
+        :param str last_modified: `Last-Modified` header of the response
+        """
+        now = time.time()
+        self.db.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (stage, url, value, etag, last_modified, now, now, len(url) + len(value)),
+        )
+        self.writes += 1
+        if self.writes % EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def refresh(self, stage, url):
+        """Mark an entry as fresh again, i.e. after it was successfully revalidated."""
+        now = time.time()
+        self.db.execute(
+            'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE stage = ? AND url = ?',
+            (now, now, stage, url),
+        )
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in its maximum size."""
+        total_size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        rows = self.db.execute('SELECT stage, url, size FROM responses ORDER BY accessed_at')
+        evicted = []
+        for stage, url, size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted.append((stage, url))
+            total_size -= size
+        self.db.executemany('DELETE FROM responses WHERE stage = ? AND url = ?', evicted)
+
+    def close(self):
+        """Evict the extra entries and close the cache."""
+        self.evict()
+        self.db.close()
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Build the headers to revalidate an entry.
+
+        :param CacheEntry entry: the cached entry
+        :returns: (dict) the `If-None-Match` and `If-Modified-Since` headers, if the entry has validators.
+        """
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
@@ -0,0 +1,133 @@
+"""Define the checkpoint journal of the runs."""
+import json
+import os
+
+# Suffix appended to the output file name to name the journal.
+JOURNAL_SUFFIX = '.checkpoint'
+
+
+class CheckpointError(Exception):
+    """Define an error preventing a run from being resumed."""
+
+
+class Checkpoint:
+    """
+    Record the progress of a run in an append-only journal.
+
+    The journal contains the parameters of the search, the business IDs which were written to the output, and the
+    offset of the next search page to retrieve, which only advances once all the businesses of the previous pages
+    have been written. Each record is a line, therefore a run killed while writing a record only loses that record.
+    """
+
+    def __init__(self, path, limit, resume=False):
+        """
+        Initialize the checkpoint.
+
+        :param str path: path of the journal
+        :param int limit: number of results per search page
+        :param bool resume: if `True`, loads the existing journal, otherwise starts a new one
+        """
+        self.path = path
+        self.limit = limit
+        self.params = None
+        self.offset = None
+        self.written = set()
+        self.resumed = resume and os.path.exists(path)
+
+        # Track the number of businesses remaining per page, by page offset.
+        self.pages = {}
+        self.page_of = {}
+
+        if self.resumed:
+            self._load()
+        self.journal = open(path, 'a' if self.resumed else 'w')
+
+    @classmethod
+    def for_output(cls, output, limit, resume=False):
+        """Create the `Checkpoint` of the `output` file."""
+        return cls(str(output) + JOURNAL_SUFFIX, limit, resume=resume)
+
+    def _load(self):
+        """Load the records of the journal."""
+        with open(self.path) as journal:
+            for line in journal:
+                kind, _, value = line.rstrip('\n').partition(' ')
+                if kind == 'params':
+                    try:
+                        self.params = json.loads(value)
+                    except ValueError:
+                        continue
+                elif kind == 'offset' and value.isdigit():
+                    self.offset = max(self.offset or 0, int(value))
+                elif kind == 'id' and value:
+                    self.written.add(value)
+
+    def _record(self, kind, value):
+        """Append a record to the journal."""
+        self.journal.write(f'{kind} {value}\n')
+        self.journal.flush()
+
+    def start(self, params):
+        """
+        Start or resume the run.
+
+        :param dict params: search parameters. When resuming, the offset is moved to the first incomplete page.
+        :raises CheckpointError: if the journal was recorded for different search parameters.
+        """
+        signature = {k: v for k, v in params.items() if k != 'offset'}
+        if self.params is not None and self.params != signature:
+            raise CheckpointError(f'The checkpoint {self.path} was recorded for another search: {self.params}.')
+        if self.params is None:
+            self.params = signature
+            self._record('params', json.dumps(signature, sort_keys=True))
+        if self.offset is not None:
+            params['offset'] = max(params['offset'], self.offset)
+
+    def page(self, offset, businesses):
+        """
+        Register a search page.
+
+        :param int offset: offset of the page
+        :param list businesses: businesses of the page
+        :returns: (list) the businesses which have not been written yet.
+        """
+        pending = [b for b in businesses if b.get('id') not in self.written]
+        self.pages[offset] = len(pending)
+        for business in pending:
+            self.page_of[business.get('id')] = offset
+        self._advance()
+        return pending
+
+    def commit(self, business):
+        """
+        Record that a business was written to the output.
+
+        :param dict business: the business
+        """
+        business_id = business.get('id')
+        if business_id:
+            self.written.add(business_id)
+            self._record('id', business_id)
+        offset = self.page_of.pop(business_id, None)
+        if offset in self.pages:
+            self.pages[offset] -= 1
+            self._advance()
+
+    def _advance(self):
+        """Record the offset of the next page once the lowest pages are complete."""
+        while self.pages:
+            lowest = min(self.pages)
+            if self.pages[lowest] > 0:
+                return
+            del self.pages[lowest]
+            self._record('offset', lowest + self.limit)
+
+    def close(self, complete=False):
+        """
+        Close the journal.
+
+        :param bool complete: if `True`, the run is complete, therefore the journal is removed.
+        """
+        self.journal.close()
+        if complete:
+            os.remove(self.path)
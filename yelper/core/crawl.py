@@ -0,0 +1,195 @@
+"""Define the crawler looking for the contact pages of the business websites."""
+import asyncio
+import heapq
+import urllib.parse
+import urllib.robotparser
+
+from yelper.core.extract import DEFAULT_MAX_PAGE_SIZE
+from yelper.core.extract import is_text
+from yelper.core.extract import PageExtractor
+from yelper.core.extract import stream_extract
+from yelper.core.ratelimit import limited_get
+
+# Default crawl settings.
+DEFAULT_MAX_PAGES = 5
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_PER_DOMAIN = 2
+DEFAULT_BUDGET = 0
+
+# Keywords indicating that a link probably leads to contact information, with their weight.
+CONTACT_KEYWORDS = {
+    'contact': 10,
+    'kontakt': 10,
+    'impressum': 8,
+    'about': 5,
+    'team': 3,
+    'staff': 3,
+    'support': 3,
+    'location': 2,
+    'info': 2,
+    'legal': 1,
+}
+
+# Extensions of the links which cannot contain contact information.
+SKIPPED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.zip', '.mp3', '.mp4', '.doc', '.docx')
+
+
+def score_link(href, text):
+    """
+    Score how likely a link leads to contact information.
+
+    :param str href: target of the link
+    :param str text: text of the link
+    :returns: (int) the score of the link, `0` meaning it is not worth following.
+    """
+    haystack = f'{urllib.parse.urlsplit(href).path} {text}'.lower()
+    return sum(weight for keyword, weight in CONTACT_KEYWORDS.items() if keyword in haystack)
+
+
+def same_domain(url, other):
+    """Check whether two URLs belong to the same domain, ignoring the `www.` prefix."""
+
+    def domain(u):
+        host = (urllib.parse.urlsplit(u).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    return domain(url) == domain(other)
+
+
+class Crawler:
+    """
+    Crawl the business websites looking for email addresses.
+
+    Starting from the home page, the crawler follows the links of the same domain which most likely lead to contact
+    information, one page at a time, and stops as soon as email addresses are found. The crawl of each business is
+    bounded in pages and depth, the number of simultaneous requests per domain is capped, and the followed pages are
+    taken from a global budget shared by the whole run. The `robots.txt` rules apply to the followed pages.
+    """
+
+    def __init__(self,
+                 session,
+                 headers=None,
+                 limiter=None,
+                 max_bytes=DEFAULT_MAX_PAGE_SIZE,
+                 max_pages=DEFAULT_MAX_PAGES,
+                 max_depth=DEFAULT_MAX_DEPTH,
+                 per_domain=DEFAULT_PER_DOMAIN,
+                 budget=DEFAULT_BUDGET):
+        """
+        Initialize the crawler.
+
+        :param aiohttp.ClientSession session: session used to perform the requests
+        :param dict headers: headers of the requests
+        :param Limiter limiter: limiter of the business websites
+        :param int max_bytes: maximum number of bytes read per page
+        :param int max_pages: maximum number of pages fetched per business, including the home page
+        :param int max_depth: maximum number of links followed from the home page
+        :param int per_domain: maximum number of simultaneous requests per domain
+        :param int budget: maximum number of pages followed during the whole run. `0` means no limit.
+        """
+        self.session = session
+        self.headers = headers or {}
+        self.limiter = limiter
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.per_domain = per_domain
+        self.budget = budget if budget > 0 else None
+        self.domains = {}
+        self.robots = {}
+
+    async def crawl(self, url):
+        """
+        Crawl a business website.
+
+        :param str url: URL of the home page
+        :returns: (set) the email addresses found.
+        :raises Exception: if the home page cannot be retrieved.
+        """
+        emails, links = await self._fetch(url)
+        frontier = []
+        visited = {url}
+        pages = 1
+        self._push(frontier, visited, url, links, 1)
+
+        while frontier and not emails and pages < self.max_pages and self.budget != 0:
+            _, depth, next_url = heapq.heappop(frontier)
+            if not await self._allowed(next_url):
+                continue
+            if self.budget is not None:
+                self.budget -= 1
+            pages += 1
+            try:
+                emails, links = await self._fetch(next_url)
+            except Exception:
+                continue
+            self._push(frontier, visited, url, links, depth + 1)
+
+        return emails
+
+    def _push(self, frontier, visited, home, links, depth):
+        """Add the links worth following to the frontier."""
+        if depth > self.max_depth:
+            return
+        for href, text in links:
+            link = urllib.parse.urljoin(home, href).split('#')[0]
+            if link in visited or not link.startswith('http') or not same_domain(home, link):
+                continue
+            if urllib.parse.urlsplit(link).path.lower().endswith(SKIPPED_EXTENSIONS):
+                continue
+            score = score_link(link, text)
+            if score > 0:
+                visited.add(link)
+                heapq.heappush(frontier, (-score, depth, link))
+
+    async def _fetch(self, url):
+        """
+        Fetch a page.
+
+        :returns: (tuple) the set of email addresses, and the list of `(href, text)` tuples of the links of the page.
+        """
+        async with self._domain(url):
+            async with limited_get(self.session, url, self.limiter, headers=self.headers, ssl=False) as response:
+                if not is_text(response):
+                    return set(), []
+                emails, links = await stream_extract(response, PageExtractor(response.charset), self.max_bytes)
+        base = str(response.url)
+        return emails, [(urllib.parse.urljoin(base, href), text) for href, text in links]
+
+    def _domain(self, url):
+        """Retrieve the semaphore capping the simultaneous requests to the domain of a URL."""
+        host = urllib.parse.urlsplit(url).hostname
+        if host not in self.domains:
+            self.domains[host] = asyncio.Semaphore(self.per_domain)
+        return self.domains[host]
+
+    async def _allowed(self, url):
+        """Check whether the `robots.txt` rules of the domain allow fetching a URL."""
+        parts = urllib.parse.urlsplit(url)
+        origin = f'{parts.scheme}://{parts.netloc}'
+        if origin not in self.robots:
+            self.robots[origin] = asyncio.ensure_future(self._robots(origin))
+        robots = await self.robots[origin]
+        return robots is None or robots.can_fetch(self.headers.get('User-Agent', '*'), url)
+
+    async def _robots(self, origin):
+        """
+        Retrieve the `robots.txt` rules of a domain.
+
+        :returns: (urllib.robotparser.RobotFileParser) the rules, or `None` if there are none.
+        """
+        try:
+            async with self._domain(origin):
+                async with limited_get(self.session,
+                                       f'{origin}/robots.txt',
+                                       self.limiter,
+                                       headers=self.headers,
+                                       ssl=False) as response:
+                    if response.status != 200:
+                        return None
+                    text = await response.text(errors='replace')
+        except Exception:
+            return None
+        robots = urllib.robotparser.RobotFileParser()
+        robots.parse(text.splitlines())
+        return robots
@@ -0,0 +1,270 @@
+"""Define the incremental extractors of the HTTP responses."""
+import codecs
+import re
+
+from lxml import etree
+
+# Brotli is optional, but when it is installed, the responses can be compressed with it.
+try:
+    import brotli  # noqa: F401 pylint: disable=unused-import
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Default maximum number of bytes read from a page.
+DEFAULT_MAX_PAGE_SIZE = 2 * 1024 * 1024
+
+# Size of the chunks read from the responses.
+CHUNK_SIZE = 16 * 1024
+
+# Pattern matching the email addresses.
+EMAIL_PATTERN = re.compile(r"[\w\.\+\-]+\@[\w]+\.[a-z]{2,4}")
+
+# Number of characters kept between two chunks, to find the email addresses spanning both.
+EMAIL_OVERLAP = 256
+
+# Content types which may contain email addresses.
+TEXT_CONTENT_TYPES = ('text/', 'application/xhtml+xml', 'application/xml', 'application/json')
+
+
+class LinkExtractor:
+    """
+    Look for the website link of a Yelp business page while it is being downloaded.
+
+    The page is fed chunk by chunk to an incremental HTML parser, which only reports the anchors. The extraction is
+    complete as soon as the anchor of the `biz-website` span is found.
+    """
+
+    def __init__(self):
+        """Initialize the extractor."""
+        self.parser = etree.HTMLPullParser(events=('start', ), tag='a')
+        self.result = None
+
+    def feed(self, chunk):
+        """
+        Parse a chunk of the page.
+
+        :param bytes chunk: chunk of the page
+        :returns: (bool) `True` if the link was found, `False` otherwise.
+        """
+        self.parser.feed(chunk)
+        for _, element in self.parser.read_events():
+            parent = element.getparent()
+            if parent is not None and parent.tag == 'span' and 'biz-website' in parent.get('class', ''):
+                self.result = element.get('href')
+                if self.result:
+                    return True
+        return False
+
+    def close(self):
+        """Complete the parsing of the page."""
+        try:
+            self.parser.close()
+        except etree.LxmlError:
+            pass
+        return self.result
+
+
+class EmailExtractor:
+    """
+    Look for the email addresses of a page while it is being downloaded.
+
+    The chunks are decoded incrementally and scanned as they arrive. The end of each chunk is kept and scanned again
+    with the next one, therefore the addresses spanning two chunks are found as well.
+    """
+
+    def __init__(self, charset=None):
+        """
+        Initialize the extractor.
+
+        :param str charset: charset of the page. Defaults to UTF-8.
+        """
+        try:
+            decoder = codecs.getincrementaldecoder(charset or 'utf-8')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')
+        self.decoder = decoder(errors='replace')
+        self.tail = ''
+        self.result = set()
+
+    def feed(self, chunk):
+        """
+        Scan a chunk of the page.
+
+        :param bytes chunk: chunk of the page
+        :returns: (bool) always `False`, since the whole page must be scanned.
+        """
+        self._scan(self.decoder.decode(chunk), final=False)
+        return False
+
+    def close(self):
+        """
+        Scan the end of the page.
+
+        :returns: (set) the email addresses found.
+        """
+        self._scan(self.decoder.decode(b'', final=True), final=True)
+        return self.result
+
+    def _scan(self, text, final):
+        """Scan the text, keeping the matches which may continue in the next chunk for later."""
+        buffer = self.tail + text
+        cut = len(buffer) if final else max(len(buffer) - EMAIL_OVERLAP, 0)
+        for match in EMAIL_PATTERN.finditer(buffer):
+            if match.end() >= cut and not final:
+                cut = min(cut, match.start())
+                break
+            self.result.add(match.group())
+        self.tail = buffer[cut:]
+
+
+class AnchorExtractor:
+    """Collect the links of a page, with their text, while it is being downloaded."""
+
+    def __init__(self):
+        """Initialize the extractor."""
+        self.parser = etree.HTMLPullParser(events=('end', ), tag='a')
+        self.result = []
+
+    def feed(self, chunk):
+        """
+        Parse a chunk of the page.
+
+        :param bytes chunk: chunk of the page
+        :returns: (bool) always `False`, since the whole page must be parsed.
+        """
+        self.parser.feed(chunk)
+        self._collect()
+        return False
+
+    def close(self):
+        """
+        Complete the parsing of the page.
+
+        :returns: (list) the `(href, text)` tuples of the links.
+        """
+        try:
+            self.parser.close()
+        except etree.LxmlError:
+            pass
+        self._collect()
+        return self.result
+
+    def _collect(self):
+        """Collect the links parsed so far."""
+        for _, element in self.parser.read_events():
+            href = element.get('href')
+            if href:
+                self.result.append((href, ' '.join(element.itertext()).strip()))
+            element.clear()
+
+
+class PageExtractor:
+    """Collect both the email addresses and the links of a page while it is being downloaded."""
+
+    def __init__(self, charset=None):
+        """
+        Initialize the extractor.
+
+        :param str charset: charset of the page. Defaults to UTF-8.
+        """
+        self.emails = EmailExtractor(charset)
+        self.anchors = AnchorExtractor()
+
+    def feed(self, chunk):
+        """
+        Parse a chunk of the page.
+
+        :param bytes chunk: chunk of the page
+        :returns: (bool) always `False`, since the whole page must be parsed.
+        """
+        self.emails.feed(chunk)
+        self.anchors.feed(chunk)
+        return False
+
+    def close(self):
+        """
+        Complete the parsing of the page.
+
+        :returns: (tuple) the set of email addresses, and the list of `(href, text)` tuples of the links.
+        """
+        return self.emails.close(), self.anchors.close()
+
+
+def is_text(response):
+    """
+    Check whether a response may contain text.
+
+    :param aiohttp.ClientResponse response: the response
+    :returns: (bool) `True` if the response has a textual content type, or no content type at all.
+    """
+    content_type = response.headers.get('Content-Type')
+    return not content_type or response.content_type.startswith(TEXT_CONTENT_TYPES)
+
+
+async def stream_extract(response, extractor, max_bytes=DEFAULT_MAX_PAGE_SIZE):
+    """
+    Feed a response to an extractor until the extraction is complete.
+
+    When the extraction completes before the end of the response, or when the response exceeds `max_bytes`, the
+    connection is closed instead of downloading the rest of the response.
+
+    :param aiohttp.ClientResponse response: the response
+    :param extractor: incremental extractor, with a `feed(chunk)` method returning `True` once complete
+    :param int max_bytes: maximum number of bytes read from the response
+    :returns: the result of the extractor.
+    """
+    remaining = max_bytes
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        if extractor.feed(chunk) or remaining <= 0:
+            response.close()
+            break
+    return extractor.close()
+
+
+async def read_bounded(response, max_bytes=DEFAULT_MAX_PAGE_SIZE):
+    """
+    Read a response, up to `max_bytes`.
+
+    When the response exceeds `max_bytes`, the connection is closed instead of downloading the rest of it.
+
+    :param aiohttp.ClientResponse response: the response
+    :param int max_bytes: maximum number of bytes read from the response
+    :returns: (bytes) the content of the response.
+    """
+    chunks = []
+    remaining = max_bytes
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        chunks.append(chunk[:remaining])
+        remaining -= len(chunks[-1])
+        if remaining <= 0:
+            response.close()
+            break
+    return b''.join(chunks)
+
+
+def extract_link(page):
+    """
+    Extract the website link of a whole Yelp business page.
+
+    :param bytes page: the page
+    :returns: (str) the link, or `None` if there is none.
+    """
+    extractor = LinkExtractor()
+    extractor.feed(page)
+    return extractor.close()
+
+
+def extract_emails(page, charset=None):
+    """
+    Extract the email addresses of a whole page.
+
+    :param bytes page: the page
+    :param str charset: charset of the page
+    :returns: (set) the email addresses.
+    """
+    extractor = EmailExtractor(charset)
+    extractor.feed(page)
+    return extractor.close()
@@ -0,0 +1,135 @@
+"""Define the streaming producer/consumer pipeline."""
+import asyncio
+
+# Default pipeline settings.
+DEFAULT_WORKERS = 50
+DEFAULT_QUEUE_SIZE = 100
+
+# Marks the end of the work.
+_END = object()
+
+
+class Pipeline:
+    """
+    Process a stream of items with a fixed-size pool of workers.
+
+    The items produced by the source are pushed into a bounded queue, consumed by the workers, and the results are
+    emitted as soon as they complete. At most `queue_size` items are in flight between the source and the consumer
+    of the results, therefore the memory usage remains constant no matter how many items the source produces, and
+    the source is slowed down when the consumer cannot keep up.
+    """
+
+    def __init__(self, process, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, ordered=False):
+        """
+        Initialize the pipeline.
+
+        :param process: coroutine function called by the workers for each item. It returns the result of the item.
+        :param int workers: number of workers processing the items concurrently
+        :param int queue_size: maximum number of items in flight
+        :param bool ordered: if `True`, the results are emitted in the order the items were produced
+        """
+        self.process = process
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, self.workers)
+        self.ordered = ordered
+
+    async def stream(self, source):
+        """
+        Process the items of the source.
+
+        :param source: asynchronous iterable producing the items to process
+        :returns: (async generator) the results, as soon as they are available.
+        """
+        window = asyncio.Semaphore(self.queue_size)
+        work_queue = asyncio.Queue(self.workers)
+        done_queue = asyncio.Queue()
+
+        # Start the stages, and mark the end of the results once they all completed or one of them failed.
+        tasks = [asyncio.ensure_future(self._produce(source, window, work_queue))]
+        tasks += [asyncio.ensure_future(self._work(work_queue, done_queue)) for _ in range(self.workers)]
+        stages = asyncio.gather(*tasks)
+        stages.add_done_callback(lambda _: done_queue.put_nowait(_END))
+
+        # Emit the results.
+        pending = {}
+        next_seq = 0
+        try:
+            while True:
+                done = await done_queue.get()
+                if done is _END:
+                    break
+                pending[done[0]] = done[1]
+                ready = self._ready(pending, next_seq)
+                next_seq += len(ready)
+                for seq in ready:
+                    window.release()
+                    yield pending.pop(seq)
+
+            # Surface the errors of the stages, if any.
+            await stages
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _ready(self, pending, next_seq):
+        """List the sequence numbers of the results which can be emitted."""
+        if not self.ordered:
+            return list(pending)
+        ready = []
+        while next_seq in pending:
+            ready.append(next_seq)
+            next_seq += 1
+        return ready
+
+    async def _produce(self, source, window, work_queue):
+        """Push the items of the source into the work queue."""
+        seq = 0
+        async for item in source:
+            await window.acquire()
+            await work_queue.put((seq, item))
+            seq += 1
+        for _ in range(self.workers):
+            await work_queue.put(_END)
+
+    async def _work(self, work_queue, done_queue):
+        """Process the items of the work queue until the end is reached."""
+        while True:
+            job = await work_queue.get()
+            if job is _END:
+                return
+            seq, item = job
+            done_queue.put_nowait((seq, await self.process(item)))
+
+
+async def merge(*sources, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Interleave the items of several sources, consuming them concurrently.
+
+    :param sources: asynchronous iterables producing the items
+    :param int queue_size: maximum number of items buffered before the sources are paused
+    :returns: (async generator) the items, in the order they were produced.
+    """
+    queue = asyncio.Queue(queue_size)
+
+    async def drain(source):
+        async for item in source:
+            await queue.put(item)
+
+    async def drain_all():
+        try:
+            await asyncio.gather(*[drain(source) for source in sources])
+        finally:
+            await queue.put(_END)
+
+    runner = asyncio.ensure_future(drain_all())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            yield item
+
+        # Surface the errors of the sources, if any.
+        await runner
+    finally:
+        runner.cancel()
@@ -0,0 +1,103 @@
+"""Define the process pool parsing the pages."""
+import asyncio
+import concurrent.futures
+
+# Default batching settings.
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_BATCH_DELAY = 0.005
+
+
+def run_batch(jobs):
+    """
+    Run a batch of jobs in a worker process.
+
+    :param list jobs: the `(func, args)` tuples to run
+    :returns: (list) the `(error, result)` tuples of each job.
+    """
+    results = []
+    for func, args in jobs:
+        try:
+            results.append((None, func(*args)))
+        except Exception as e:
+            results.append((e, None))
+    return results
+
+
+class ParsePool:
+    """
+    Run the CPU bound functions, like the parsing of the pages, in a pool of processes.
+
+    The calls are grouped in batches of up to `batch_size` calls, or the calls made within `batch_delay` seconds,
+    to amortize the cost of the communication with the worker processes. The functions and their arguments must be
+    picklable, and their results should be small.
+    """
+
+    def __init__(self, workers, batch_size=DEFAULT_BATCH_SIZE, batch_delay=DEFAULT_BATCH_DELAY):
+        """
+        Initialize the pool.
+
+        :param int workers: number of worker processes
+        :param int batch_size: maximum number of calls per batch
+        :param float batch_delay: maximum number of seconds a call waits for its batch to be sent
+        """
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers)
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.pending = []
+        self.timer = None
+
+    async def run(self, func, *args):
+        """
+        Run a function in the pool.
+
+        :param func: module level function
+        :param args: arguments of the function
+        :returns: the result of the function.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.pending.append((func, args, future))
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+        elif not self.timer:
+            self.timer = loop.call_later(self.batch_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send the pending calls to the pool as a batch."""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        futures = [future for _, _, future in batch]
+        jobs = [(func, args) for func, args, _ in batch]
+        done = asyncio.get_event_loop().run_in_executor(self.executor, run_batch, jobs)
+        done.add_done_callback(lambda f: self._resolve(futures, f))
+
+    @staticmethod
+    def _resolve(futures, done):
+        """Resolve the futures of the calls of a batch."""
+        if done.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+        if done.exception():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(done.exception())
+            return
+
+        for future, (error, result) in zip(futures, done.result()):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Stop the worker processes."""
+        self.executor.shutdown()
@@ -0,0 +1,274 @@
+"""Define the rate limiting and the adaptive concurrency control."""
+import asyncio
+import collections
+import contextlib
+import email.utils
+import random
+import time
+
+import aiohttp
+
+# Default rates (in requests per second). `0` means no limit.
+DEFAULT_SEARCH_RATE = 5
+DEFAULT_YELP_RATE = 10
+DEFAULT_WEB_RATE = 0
+
+# Default retry settings.
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 60
+
+# Default initial concurrency of the adaptive limiters.
+DEFAULT_INITIAL_CONCURRENCY = 10
+
+# Status codes indicating that the request must be retried later.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limit the rate of the requests.
+
+    The bucket holds up to `burst` tokens and is refilled at `rate` tokens per second. Each request consumes a token.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize the bucket.
+
+        :param float rate: number of requests per second. `0` or less means no limit.
+        :param int burst: maximum number of requests sent at once. Defaults to the rate.
+        """
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a request can be sent."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit the number of requests in flight, adapting the limit to the health of the responses.
+
+    The limit follows an additive-increase/multiplicative-decrease (AIMD) policy: it grows by about one slot per
+    window of healthy responses, and is cut by `decrease` each time a request gets throttled or times out.
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL_CONCURRENCY, minimum=1, maximum=100, decrease=0.5):
+        """
+        Initialize the limiter.
+
+        :param int initial: initial number of requests in flight
+        :param int minimum: minimum number of requests in flight
+        :param int maximum: maximum number of requests in flight
+        :param float decrease: factor applied to the limit on failures
+        """
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.in_flight = 0
+        self.waiters = collections.deque()
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_event_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        """Free a slot."""
+        self.in_flight -= 1
+        self._wake()
+
+    def success(self):
+        """Increase the limit after a healthy response."""
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def failure(self):
+        """Decrease the limit after a throttled or failed request."""
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+    def _wake(self):
+        """Wake up as many waiters as there are free slots."""
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class Limiter:
+    """
+    Limit the requests sent to an endpoint.
+
+    The requests go through a token bucket and an adaptive concurrency limiter. The throttled requests (429), the
+    server errors (5xx) and the connection errors are retried with a jittered exponential backoff, honoring the
+    `Retry-After` header when the server provides one.
+    """
+
+    def __init__(self,
+                 rate=0,
+                 concurrency=DEFAULT_INITIAL_CONCURRENCY,
+                 max_concurrency=100,
+                 retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF):
+        """
+        Initialize the limiter.
+
+        :param float rate: number of requests per second. `0` or less means no limit.
+        :param int concurrency: initial number of requests in flight
+        :param int max_concurrency: maximum number of requests in flight
+        :param int retries: maximum number of retries per request
+        :param float backoff: base delay between two attempts (in seconds)
+        """
+        self.bucket = TokenBucket(rate)
+        self.concurrency = AdaptiveConcurrency(concurrency, maximum=max_concurrency)
+        self.retries = retries
+        self.backoff = backoff
+
+    def delay(self, attempt, response=None):
+        """
+        Compute the delay before the next attempt.
+
+        :param int attempt: number of the failed attempt, starting at 0
+        :param aiohttp.ClientResponse response: the response of the failed attempt, if any
+        :returns: (float) the delay in seconds.
+        """
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, MAX_BACKOFF)
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * 2**attempt))
+
+    @contextlib.asynccontextmanager
+    async def request(self, session, method, url, **kwargs):
+        """
+        Send a request, retrying it if needed.
+
+        :param aiohttp.ClientSession session: session used to perform the request
+        :param str method: HTTP method
+        :param str url: URL of the request
+        :param kwargs: arguments of `aiohttp.ClientSession.request`
+        :returns: (aiohttp.ClientResponse) the response, which gets released when leaving the context.
+        :raises aiohttp.ClientResponseError: if the request was still throttled after the last retry.
+        """
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            await self.concurrency.acquire()
+            try:
+                response = await self._send(session, method, url, attempt, **kwargs)
+                if response is not None and response.status not in RETRY_STATUSES:
+                    self.concurrency.success()
+                    try:
+                        yield response
+                    finally:
+                        response.release()
+                    return
+            finally:
+                self.concurrency.release()
+
+            await asyncio.sleep(self.delay(attempt, response))
+            attempt += 1
+
+    async def _send(self, session, method, url, attempt, **kwargs):
+        """
+        Send a single attempt of a request.
+
+        :returns: (aiohttp.ClientResponse) the response, or `None` if the attempt failed and can be retried.
+        """
+        last = attempt >= self.retries
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.concurrency.failure()
+            if last:
+                raise
+            return None
+
+        if response.status in RETRY_STATUSES:
+            self.concurrency.failure()
+            response.release()
+            if last:
+                response.raise_for_status()
+        return response
+
+
+def parse_retry_after(value):
+    """
+    Parse the value of a `Retry-After` header.
+
+    :param str value: either a number of seconds or an HTTP date
+    :returns: (float) the number of seconds to wait, or `None` if the value is invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def create_limiters(search_rate=DEFAULT_SEARCH_RATE,
+                    yelp_rate=DEFAULT_YELP_RATE,
+                    web_rate=DEFAULT_WEB_RATE,
+                    retries=DEFAULT_RETRIES,
+                    max_concurrency=100):
+    """
+    Create the limiters of the endpoints used by a run.
+
+    The concurrency towards the Yelp endpoints adapts to their responses. The business websites are spread over many
+    hosts, therefore their concurrency is not adapted globally.
+
+    :param float search_rate: number of requests per second sent to the Yelp Fusion search API
+    :param float yelp_rate: number of requests per second sent to the Yelp business pages
+    :param float web_rate: number of requests per second sent to the business websites
+    :param int retries: maximum number of retries per request
+    :param int max_concurrency: maximum number of requests in flight per endpoint
+    :returns: (dict) the `search`, `yelp` and `web` limiters.
+    """
+    return {
+        'search': Limiter(search_rate, max_concurrency=max_concurrency, retries=retries),
+        'yelp': Limiter(yelp_rate, max_concurrency=max_concurrency, retries=retries),
+        'web': Limiter(web_rate, concurrency=max_concurrency, max_concurrency=max_concurrency, retries=retries),
+    }
+
+
+def limited_get(session, url, limiter=None, **kwargs):
+    """
+    Send a GET request through the limiter of its endpoint, if any.
+
+    :param aiohttp.ClientSession session: session used to perform the request
+    :param str url: URL of the request
+    :param Limiter limiter: limiter of the endpoint
+    :param kwargs: arguments of `aiohttp.ClientSession.get`
+    :returns: an asynchronous context manager returning the response.
+    """
+    if limiter:
+        return limiter.request(session, 'GET', url, **kwargs)
+    return session.get(url, **kwargs)
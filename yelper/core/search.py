@@ -0,0 +1,53 @@
+"""Define the asynchronous Yelp Fusion search client."""
+from yelper.core.ratelimit import limited_get
+
+SEARCH_URL = 'https://api.yelp.com/v3/businesses/search'
+
+
+class YelpSearchError(Exception):
+    """Define an error returned by the Yelp Fusion API."""
+
+
+class YelpSearchClient:
+    """
+    Query the Yelp Fusion search endpoint without blocking the event loop.
+
+    The client is a drop-in replacement for `yelpapi.YelpAPI.search_query`, but it uses the `aiohttp` session of
+    the run, therefore the searches share its connection pool.
+    """
+
+    def __init__(self, api_key, session, url=SEARCH_URL, limiter=None):
+        """
+        Initialize the client.
+
+        :param str api_key: Yelp Fusion API key
+        :param aiohttp.ClientSession session: session used to perform the requests
+        :param str url: URL of the search endpoint
+        :param Limiter limiter: limiter of the search endpoint
+        """
+        self.api_key = api_key
+        self.session = session
+        self.url = url
+        self.limiter = limiter
+
+    async def search_query(self, **kwargs):
+        """
+        Search for businesses.
+
+        :param kwargs: search parameters, i.e. `term`, `location`, `offset`, `limit`, `radius`.
+        :returns: (dict) the decoded search response.
+        """
+        return await self._query(self.url, **kwargs)
+
+    async def _query(self, url, **kwargs):
+        """Perform the query and decode the response."""
+        params = {k: v for k, v in kwargs.items() if v is not None}
+        headers = {'Authorization': f'Bearer {self.api_key}'}
+        async with limited_get(self.session, url, self.limiter, headers=headers, params=params) as response:
+            response_json = await response.json(content_type=None)
+
+        if 'error' in response_json:
+            error = response_json['error']
+            raise YelpSearchError(f'{error.get("code")}: {error.get("description")}')
+
+        return response_json
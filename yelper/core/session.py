@@ -0,0 +1,35 @@
+"""Define the shared HTTP session."""
+import aiohttp
+
+# Default connection pool settings.
+DEFAULT_CONCURRENCY = 100
+DEFAULT_PER_HOST = 10
+DEFAULT_DNS_TTL = 300
+DEFAULT_KEEPALIVE = 30
+
+
+def create_session(concurrency=DEFAULT_CONCURRENCY,
+                   per_host=DEFAULT_PER_HOST,
+                   dns_ttl=DEFAULT_DNS_TTL,
+                   keepalive=DEFAULT_KEEPALIVE):
+    """
+    Create a pooled HTTP session meant to be shared by a whole run.
+
+    The connections are kept alive between the requests, and the DNS lookups are cached, therefore the TCP/TLS
+    handshakes only happen once per host instead of once per business.
+
+    :param int concurrency: maximum number of simultaneous connections. `0` means no limit.
+    :param int per_host: maximum number of simultaneous connections to the same host. `0` means no limit.
+    :param int dns_ttl: number of seconds the DNS lookups remain cached.
+    :param int keepalive: number of seconds an idle connection is kept open.
+    :returns: (aiohttp.ClientSession) the session, which must be closed by the caller.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=per_host,
+        use_dns_cache=True,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive,
+        ssl=False,
+    )
+    return aiohttp.ClientSession(connector=connector)
@@ -0,0 +1,307 @@
+"""Define the writers storing the businesses."""
+import abc
+import asyncio
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+# Default writer settings.
+DEFAULT_FORMAT = 'csv'
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_QUEUE_SIZE = 10000
+
+# Marks the end of the rows.
+_END = object()
+
+
+class AbstractWriter:
+    """
+    Base class for the writers.
+
+    The writers receive the businesses as tuples of values, in the order of the field names, by batches.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    # Extension of the files written.
+    extension = ''
+
+    def __init__(self, path, fieldnames, append=False):
+        """
+        Initialize the writer.
+
+        :param str path: path of the output
+        :param list fieldnames: names of the fields of the rows
+        :param bool append: if `True`, the rows are appended to the existing output
+        """
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.append = append
+
+    @abc.abstractmethod
+    def write_batch(self, rows):
+        """Write a batch of rows."""
+        raise NotImplementedError
+
+    def flush(self, fsync=False):
+        """Flush the rows written so far, and synchronize them to the disk if `fsync` is `True`."""
+
+    def close(self):
+        """Close the output."""
+
+
+class FileWriter(AbstractWriter):
+    """Base class for the writers storing the rows in a text file."""
+
+    def __init__(self, path, fieldnames, append=False):
+        """Initialize the writer."""
+        super().__init__(path, fieldnames, append)
+        self.file = open(path, 'a' if append else 'w', newline='')
+
+    def flush(self, fsync=False):
+        """Flush the rows written so far, and synchronize them to the disk if `fsync` is `True`."""
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        """Close the output."""
+        self.file.close()
+
+
+class CsvWriter(FileWriter):
+    """Write the rows to a CSV file."""
+
+    extension = 'csv'
+
+    def __init__(self, path, fieldnames, append=False):
+        """Initialize the writer."""
+        super().__init__(path, fieldnames, append)
+        self.writer = csv.writer(self.file)
+        if not self.file.tell():
+            self.writer.writerow(self.fieldnames)
+
+    def write_batch(self, rows):
+        """Write a batch of rows."""
+        self.writer.writerows(rows)
+
+
+class JsonLinesWriter(FileWriter):
+    """Write the rows to a JSON Lines file, one object per line."""
+
+    extension = 'jsonl'
+
+    def write_batch(self, rows):
+        """Write a batch of rows."""
+        self.file.writelines(json.dumps(dict(zip(self.fieldnames, row)), ensure_ascii=False) + '\n' for row in rows)
+
+
+class SqliteWriter(AbstractWriter):
+    """
+    Write the rows to a SQLite database.
+
+    The rows are stored in the `businesses` table, keyed by the Yelp business id: writing a business again replaces
+    the previous row instead of adding a duplicate.
+    """
+
+    extension = 'sqlite'
+
+    def __init__(self, path, fieldnames, append=False):
+        """Initialize the writer."""
+        super().__init__(path, fieldnames, append)
+        if not append and os.path.exists(path):
+            os.remove(path)
+        self.db = sqlite3.connect(path)
+        columns = ', '.join(f'"{name}" TEXT' + (' PRIMARY KEY' if name == 'id' else '') for name in self.fieldnames)
+        self.db.execute(f'CREATE TABLE IF NOT EXISTS businesses ({columns})')
+        placeholders = ', '.join('?' for _ in self.fieldnames)
+        self.statement = f'INSERT OR REPLACE INTO businesses VALUES ({placeholders})'
+        self.id_index = self.fieldnames.index('id') if 'id' in self.fieldnames else None
+
+    def write_batch(self, rows):
+        """Write a batch of rows."""
+        if self.id_index is not None:
+            # The businesses without id must not replace each other.
+            rows = [row[:self.id_index] + ((row[self.id_index] or None), ) + row[self.id_index + 1:] for row in rows]
+        self.db.executemany(self.statement, rows)
+
+    def flush(self, fsync=False):
+        """Commit the rows written so far. The commits are always synchronized to the disk."""
+        self.db.commit()
+
+    def close(self):
+        """Close the output."""
+        self.db.commit()
+        self.db.close()
+
+
+class ParquetWriter(AbstractWriter):
+    """
+    Write the rows to a Parquet file.
+
+    Each batch becomes a row group of the file. This writer requires `pyarrow`, and cannot append to an existing
+    file.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, path, fieldnames, append=False):
+        """Initialize the writer."""
+        super().__init__(path, fieldnames, append)
+        if append:
+            raise ValueError('The Parquet files cannot be appended to.')
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('The Parquet format requires pyarrow (pip install yelper[parquet]).')
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(name, pyarrow.string()) for name in self.fieldnames])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_batch(self, rows):
+        """Write a batch of rows."""
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pyarrow.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        """Close the output."""
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'jsonl': JsonLinesWriter,
+    'sqlite': SqliteWriter,
+    'parquet': ParquetWriter,
+}
+
+
+class ThreadedWriter:
+    """
+    Run a writer on a dedicated thread.
+
+    The rows are queued by the event loop, and written by batches of up to `batch_size` rows, or every
+    `flush_interval` seconds, whichever comes first. Each batch is flushed, and synchronized to the disk if `fsync` is
+    `True`, before the callbacks of its rows are called back on the event loop.
+    """
+
+    def __init__(self,
+                 writer,
+                 batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 fsync=False,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Initialize the writer and start its thread.
+
+        :param AbstractWriter writer: the writer
+        :param int batch_size: maximum number of rows per batch
+        :param float flush_interval: maximum number of seconds a row waits before being written
+        :param bool fsync: if `True`, the batches are synchronized to the disk
+        :param int queue_size: maximum number of rows waiting to be written
+        """
+        self.writer = writer
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.loop = asyncio.get_event_loop()
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f'writer-{writer.path}', daemon=True)
+        self.thread.start()
+
+    async def write(self, row, callback=None):
+        """
+        Queue a row.
+
+        :param tuple row: the row
+        :param callback: function called on the event loop once the row was flushed
+        :raises Exception: the error which stopped the writer thread, if any.
+        """
+        if self.error:
+            raise self.error
+        try:
+            self.queue.put_nowait((row, callback))
+        except queue.Full:
+            await self.loop.run_in_executor(None, self.queue.put, (row, callback))
+
+    async def close(self):
+        """
+        Write the remaining rows, stop the thread and close the writer.
+
+        :raises Exception: the error which stopped the writer thread, if any.
+        """
+        await self.loop.run_in_executor(None, self.queue.put, _END)
+        await self.loop.run_in_executor(None, self.thread.join)
+
+        # Let the last callbacks run.
+        await asyncio.sleep(0)
+        if self.error:
+            raise self.error
+
+    def _run(self):
+        """Write the rows of the queue by batches."""
+        done = False
+        try:
+            while not done:
+                batch, done = self._next_batch()
+                if batch:
+                    self.writer.write_batch([row for row, _ in batch])
+                    self.writer.flush(self.fsync)
+                    callbacks = [callback for _, callback in batch if callback]
+                    if callbacks:
+                        self.loop.call_soon_threadsafe(_call_all, callbacks)
+        except Exception as e:
+            self.error = e
+            if not done:
+                self._drain()
+        finally:
+            self.writer.close()
+
+    def _next_batch(self):
+        """
+        Collect the next batch of rows.
+
+        :returns: (tuple) the batch, and whether the end of the rows was reached.
+        """
+        batch = []
+        try:
+            item = self.queue.get()
+            while item is not _END:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    return batch, False
+                item = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, False
+        return batch, True
+
+    def _drain(self):
+        """Consume the queue until the end, so that the event loop is never blocked by a failed writer."""
+        while self.queue.get() is not _END:
+            pass
+
+
+def _call_all(callbacks):
+    """Call the callbacks of a batch."""
+    for callback in callbacks:
+        callback()
+
+
+def create_writer(path, fieldnames, fmt=DEFAULT_FORMAT, append=False, **kwargs):
+    """
+    Create a threaded writer.
+
+    :param str path: path of the output
+    :param list fieldnames: names of the fields of the rows
+    :param str fmt: format of the output (see `WRITERS`)
+    :param bool append: if `True`, the rows are appended to the existing output
+    :param kwargs: settings of the `ThreadedWriter`
+    :returns: (ThreadedWriter) the writer, which must be closed by the caller.
+    """
+    return ThreadedWriter(WRITERS[fmt](path, fieldnames, append=append), **kwargs)
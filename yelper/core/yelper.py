@@ -1,15 +1,49 @@
 """Define the core functions."""
 import asyncio
-import csv
+import collections
+import contextlib
 import dataclasses
+import functools
+import operator
 import os
 import re
 import urllib
 import urllib3
 
-import aiohttp
-from lxml import html
-from yelpapi import YelpAPI
+from yelper.core import session as yelper_session
+from yelper.core.cache import DEFAULT_TTL
+from yelper.core.cache import ResponseCache
+from yelper.core.checkpoint import Checkpoint
+from yelper.core.crawl import Crawler
+from yelper.core.crawl import DEFAULT_BUDGET
+from yelper.core.crawl import DEFAULT_MAX_DEPTH
+from yelper.core.crawl import DEFAULT_MAX_PAGES
+from yelper.core.crawl import DEFAULT_PER_DOMAIN
+from yelper.core.extract import ACCEPT_ENCODING
+from yelper.core.extract import DEFAULT_MAX_PAGE_SIZE
+from yelper.core.extract import EmailExtractor
+from yelper.core.extract import extract_emails
+from yelper.core.extract import extract_link
+from yelper.core.extract import is_text
+from yelper.core.extract import LinkExtractor
+from yelper.core.extract import read_bounded
+from yelper.core.extract import stream_extract
+from yelper.core.pipeline import DEFAULT_QUEUE_SIZE
+from yelper.core.pipeline import DEFAULT_WORKERS
+from yelper.core.pipeline import Pipeline
+from yelper.core.pool import ParsePool
+from yelper.core.ratelimit import create_limiters
+from yelper.core.ratelimit import DEFAULT_RETRIES
+from yelper.core.ratelimit import DEFAULT_SEARCH_RATE
+from yelper.core.ratelimit import DEFAULT_WEB_RATE
+from yelper.core.ratelimit import DEFAULT_YELP_RATE
+from yelper.core.ratelimit import limited_get
+from yelper.core.search import YelpSearchClient
+from yelper.core.writers import create_writer
+from yelper.core.writers import DEFAULT_BATCH_SIZE
+from yelper.core.writers import DEFAULT_FLUSH_INTERVAL
+from yelper.core.writers import DEFAULT_FORMAT
+from yelper.core.writers import WRITERS
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -29,6 +63,7 @@ class YelpBusiness:
     zipcode: str = ''
     link: str = ''
     emails: str = ''
+    id: str = ''  # pylint: disable=invalid-name
 
     @classmethod
     def from_dict(cls, other_dict):
@@ -39,65 +74,356 @@ class YelpBusiness:
         d.zipcode = other_dict.get('location', {}).get('zip_code', '')
         d.link = other_dict.get('link', '')
         d.emails = other_dict.get('emails', '')
+        d.id = other_dict.get('id', '')
         return d
 
 
-async def deep_link(url, session):
-    """Retrieve the URL from the business detail page."""
+# Names of the fields of the businesses, in the order of the output columns.
+FIELDNAMES = tuple(field.name for field in dataclasses.fields(YelpBusiness))
+
+# Convert a business to a row of the output.
+entry_row = operator.attrgetter(*FIELDNAMES)
+
+
+def _cached(cache, stage, url):
+    """Retrieve the cached entry of a response, if the cache is enabled."""
+    return cache.get(stage, url) if cache else None
+
+
+def _store(cache, stage, url, value, request):
+    """Store the value extracted from a response, if the cache is enabled."""
+    if cache:
+        cache.set(stage, url, value, request.headers.get('ETag'), request.headers.get('Last-Modified'))
+
+
+async def deep_link(url, session, cache=None, limiter=None, max_bytes=DEFAULT_MAX_PAGE_SIZE, pool=None):
+    """
+    Retrieve the URL from the business detail page.
+
+    The page is parsed while it is being downloaded, and the download stops as soon as the link is found or once
+    `max_bytes` were read. If a `ParsePool` is provided, the page is downloaded (up to `max_bytes`) and parsed by
+    the pool instead, to keep the event loop free.
+    """
     if not url:
         return f'\u274C'
 
+    # Use the cached link if it is still fresh.
+    cached = _cached(cache, 'link', url)
+    if cached and cached.fresh:
+        return cached.value
+
     try:
-        async with session.get(url, headers=HEADERS, ssl=False) as request:
-            response = await request.text()
-            parser = html.fromstring(response)
-            raw_website_link = parser.xpath("//span[contains(@class,'biz-website')]/a/@href")
+        headers = {**HEADERS, **ResponseCache.conditional_headers(cached)}
+        async with limited_get(session, url, limiter, headers=headers, ssl=False) as request:
+            if request.status == 304 and cached:
+                cache.refresh('link', url)
+                return cached.value
+            if pool:
+                raw_website_link = await pool.run(extract_link, await read_bounded(request, max_bytes))
+            else:
+                raw_website_link = await stream_extract(request, LinkExtractor(), max_bytes)
     except Exception:
         return f'\U0001F611'
 
     if not raw_website_link:
-        return f'\u274C'
+        website = f'\u274C'
+    else:
+        decoded_raw_website_link = urllib.parse.unquote(raw_website_link)
+        website = re.findall(r"biz_redir\?url=(.*)&website_link", decoded_raw_website_link)[0]
 
-    decoded_raw_website_link = urllib.parse.unquote(raw_website_link[0])
-    website = re.findall(r"biz_redir\?url=(.*)&website_link", decoded_raw_website_link)[0]
+    _store(cache, 'link', url, website, request)
     return website
 
 
-async def deep_emails(url, session):
-    """Retrieve the email addresses on the main page."""
+async def deep_emails(url, session, cache=None, limiter=None, max_bytes=DEFAULT_MAX_PAGE_SIZE, pool=None):
+    """
+    Retrieve the email addresses on the main page.
+
+    The page is scanned while it is being downloaded, and the download stops once `max_bytes` were read. The
+    responses which cannot contain text, like images or PDFs, are not downloaded. If a `ParsePool` is provided, the
+    page is scanned by the pool instead, to keep the event loop free.
+    """
     if not url:
         return f'\u274C'
 
+    # Use the cached emails if they are still fresh.
+    cached = _cached(cache, 'emails', url)
+    if cached and cached.fresh:
+        return cached.value
+
     try:
-        async with session.get(url, headers=HEADERS, ssl=False) as request:
-            response = await request.text()
-            emails = re.findall(r"[\w\.\+\-]+\@[\w]+\.[a-z]{2,4}", response)
+        headers = {**HEADERS, **ResponseCache.conditional_headers(cached), 'Accept-Encoding': ACCEPT_ENCODING}
+        async with limited_get(session, url, limiter, headers=headers, ssl=False) as request:
+            if request.status == 304 and cached:
+                cache.refresh('emails', url)
+                return cached.value
+            emails = set()
+            if is_text(request) and pool:
+                emails = await pool.run(extract_emails, await read_bounded(request, max_bytes), request.charset)
+            elif is_text(request):
+                emails = await stream_extract(request, EmailExtractor(request.charset), max_bytes)
     except Exception:
         return f'\U0001F611'
 
-    return ', '.join(set(emails)) if emails else f'\U0001F611'
+    result = ', '.join(emails) if emails else f'\U0001F611'
+    _store(cache, 'emails', url, result, request)
+    return result
+
 
+async def deep_crawl(url, crawler, cache=None):
+    """Retrieve the email addresses of the business website, crawling its contact pages if needed."""
+    if not url:
+        return f'\u274C'
 
-async def deep_entry_parsing(business, counter):
+    # Use the cached emails if they are still fresh.
+    cached = _cached(cache, 'crawl', url)
+    if cached and cached.fresh:
+        return cached.value
+
+    try:
+        emails = await crawler.crawl(url)
+    except Exception:
+        return f'\U0001F611'
+
+    result = ', '.join(emails) if emails else f'\U0001F611'
+    if cache:
+        cache.set('crawl', url, result)
+    return result
+
+
+async def deep_entry_parsing(business,
+                             counter,
+                             session,
+                             cache=None,
+                             limiters=None,
+                             max_page_size=DEFAULT_MAX_PAGE_SIZE,
+                             pool=None,
+                             crawler=None):
     """."""
     # Prepare the new entry.
     try:
         entry = YelpBusiness.from_dict(business)
     except Exception:
         print(f'{counter:04} Skipped due to error.')
+        return None
     print(f'{counter:04} {entry.name}')
 
     # Dig deeper.
-    async with aiohttp.ClientSession() as session:
-        entry.link = await deep_link(business.get('url'), session)
-        entry.emails = await deep_emails(entry.link, session)
+    limiters = limiters or {}
+    entry.link = await deep_link(business.get('url'),
+                                 session,
+                                 cache=cache,
+                                 limiter=limiters.get('yelp'),
+                                 max_bytes=max_page_size,
+                                 pool=pool)
+    if crawler:
+        entry.emails = await deep_crawl(entry.link, crawler, cache=cache)
+    else:
+        entry.emails = await deep_emails(entry.link,
+                                         session,
+                                         cache=cache,
+                                         limiter=limiters.get('web'),
+                                         max_bytes=max_page_size,
+                                         pool=pool)
     return entry
 
 
-async def async_deep_query(terms, location, offset=0, limit=20, radius=40000, output='yelper.csv', pages=-1):
-    """Define the application entrypoint."""
-    # Prepare the Yelp client.
-    yelp_api = YelpAPI(os.environ['YELP_API_KEY'])
+def _prefetch_page(yelp_api, params, pages):
+    """
+    Start fetching the search page described by `params` in the background.
+
+    :returns: (asyncio.Future) the future search results, or `None` if the page is beyond the requested pages.
+    """
+    if (params['offset'] / params['limit']) >= pages > 0:
+        return None
+    return asyncio.ensure_future(yelp_api.search_query(**params))
+
+
+async def search_pages(yelp_api, params, pages):
+    """
+    Search Yelp page by page.
+
+    The next page is fetched while the businesses of the current page are being consumed.
+
+    :param YelpSearchClient yelp_api: Yelp client
+    :param dict params: search parameters. The offset gets updated as the pages are retrieved.
+    :param int pages: number of result pages. `0` or less means all the pages.
+    :returns: (async generator) the `(offset, businesses)` tuples of each page.
+    """
+    next_page = _prefetch_page(yelp_api, params, pages)
+    try:
+        while next_page:
+            search_results = await next_page
+
+            # Check whether we need to process further or not.
+            if not search_results:
+                break
+            if not search_results['businesses']:
+                break
+
+            # Prefetch the next page while the current one is being processed.
+            page_offset = params['offset']
+            params['offset'] += params['limit']
+            next_page = _prefetch_page(yelp_api, params, pages)
+
+            yield page_offset, search_results['businesses']
+    finally:
+        if next_page:
+            next_page.cancel()
+
+
+async def search_businesses(yelp_api, params, pages, checkpoint=None):
+    """
+    Search Yelp and produce the businesses one by one.
+
+    :param YelpSearchClient yelp_api: Yelp client
+    :param dict params: search parameters. The offset gets updated as the pages are retrieved.
+    :param int pages: number of result pages. `0` or less means all the pages.
+    :param Checkpoint checkpoint: if set, the businesses already written are skipped
+    :returns: (async generator) the `(counter, business)` tuples.
+    """
+    async for page_offset, businesses in search_pages(yelp_api, params, pages):
+        if checkpoint:
+            businesses = checkpoint.page(page_offset, businesses)
+        for i, business in enumerate(businesses):
+            yield page_offset + i, business
+
+
+Resources = collections.namedtuple('Resources',
+                                   ['session', 'cache', 'limiters', 'yelp_api', 'max_page_size', 'pool', 'crawler'])
+
+
+async def open_resources(stack,
+                         concurrency=yelper_session.DEFAULT_CONCURRENCY,
+                         per_host=yelper_session.DEFAULT_PER_HOST,
+                         dns_ttl=yelper_session.DEFAULT_DNS_TTL,
+                         keepalive=yelper_session.DEFAULT_KEEPALIVE,
+                         cache_dir=None,
+                         cache_ttl=DEFAULT_TTL,
+                         search_rate=DEFAULT_SEARCH_RATE,
+                         yelp_rate=DEFAULT_YELP_RATE,
+                         web_rate=DEFAULT_WEB_RATE,
+                         retries=DEFAULT_RETRIES,
+                         max_page_size=DEFAULT_MAX_PAGE_SIZE,
+                         parse_workers=0,
+                         crawl=False,
+                         crawl_pages=DEFAULT_MAX_PAGES,
+                         crawl_depth=DEFAULT_MAX_DEPTH,
+                         crawl_per_domain=DEFAULT_PER_DOMAIN,
+                         crawl_budget=DEFAULT_BUDGET):
+    """
+    Open the resources shared by a whole run.
+
+    :param contextlib.AsyncExitStack stack: stack closing the resources at the end of the run
+    :returns: (Resources) the HTTP session, the response cache (if enabled), the limiters, the Yelp client, the
+        maximum number of bytes read per page, the pool parsing the pages (if enabled) and the crawler of the
+        business websites (if enabled).
+    """
+    # Prepare the response cache.
+    cache = None
+    if cache_dir:
+        cache = ResponseCache.from_dir(cache_dir, ttl=cache_ttl)
+        stack.callback(cache.close)
+
+    # Prepare the pool of processes parsing the pages.
+    pool = None
+    if parse_workers > 0:
+        pool = ParsePool(parse_workers)
+        stack.callback(pool.close)
+
+    # Prepare the HTTP session and the limiters, and the Yelp client.
+    session = await stack.enter_async_context(yelper_session.create_session(concurrency, per_host, dns_ttl, keepalive))
+    limiters = create_limiters(search_rate,
+                               yelp_rate,
+                               web_rate,
+                               retries,
+                               max_concurrency=concurrency or yelper_session.DEFAULT_CONCURRENCY)
+    yelp_api = YelpSearchClient(os.environ['YELP_API_KEY'], session, limiter=limiters['search'])
+
+    # Prepare the crawler of the business websites.
+    crawler = None
+    if crawl:
+        crawler = Crawler(session,
+                          headers={
+                              **HEADERS, 'Accept-Encoding': ACCEPT_ENCODING
+                          },
+                          limiter=limiters['web'],
+                          max_bytes=max_page_size,
+                          max_pages=crawl_pages,
+                          max_depth=crawl_depth,
+                          per_domain=crawl_per_domain,
+                          budget=crawl_budget)
+
+    return Resources(session, cache, limiters, yelp_api, max_page_size, pool, crawler)
+
+
+async def parse_entry(business, counter, resources):
+    """Dig deeper into a business using the resources of the run (see `deep_entry_parsing`)."""
+    return await deep_entry_parsing(business,
+                                    counter,
+                                    resources.session,
+                                    cache=resources.cache,
+                                    limiters=resources.limiters,
+                                    max_page_size=resources.max_page_size,
+                                    pool=resources.pool,
+                                    crawler=resources.crawler)
+
+
+def open_writer(stack,
+                output,
+                output_format=DEFAULT_FORMAT,
+                append=False,
+                flush_rows=DEFAULT_BATCH_SIZE,
+                flush_interval=DEFAULT_FLUSH_INTERVAL,
+                fsync=False):
+    """
+    Open a writer to write the businesses to.
+
+    The businesses are written by a dedicated thread, by batches of up to `flush_rows` businesses, or every
+    `flush_interval` seconds.
+
+    :param contextlib.AsyncExitStack stack: stack closing the writer
+    :param str output: path of the output
+    :param str output_format: format of the output (see `yelper.core.writers.WRITERS`)
+    :param bool append: if `True`, the businesses are appended to the output
+    :param int flush_rows: maximum number of businesses per batch
+    :param float flush_interval: maximum number of seconds a business waits before being written
+    :param bool fsync: if `True`, each batch is synchronized to the disk
+    :returns: (ThreadedWriter) the writer.
+    """
+    writer = create_writer(output,
+                           FIELDNAMES,
+                           output_format,
+                           append=append,
+                           batch_size=flush_rows,
+                           flush_interval=flush_interval,
+                           fsync=fsync)
+    stack.push_async_callback(writer.close)
+    return writer
+
+
+async def async_deep_query(terms,
+                           location,
+                           offset=0,
+                           limit=20,
+                           radius=40000,
+                           output=None,
+                           pages=-1,
+                           workers=DEFAULT_WORKERS,
+                           queue_size=DEFAULT_QUEUE_SIZE,
+                           ordered=False,
+                           resume=False,
+                           output_format=DEFAULT_FORMAT,
+                           writer_options=None,
+                           **kwargs):
+    """
+    Define the application entrypoint.
+
+    The output defaults to `yelper.<extension>` of the `output_format`. The `writer_options` configure the batches of
+    the writer (see `open_writer`), and the extra keyword arguments configure the resources of the run (see
+    `open_resources`).
+    """
+    output = output or f'yelper.{WRITERS[output_format].extension}'
     params = {
         'term': terms,
         'location': location,
@@ -106,41 +432,41 @@ async def async_deep_query(terms, location, offset=0, limit=20, radius=40000, ou
         'radius': radius,
     }
 
-    # Prepare the CSV file.
-    fieldnames = dataclasses.asdict(YelpBusiness('fake')).keys()
-    with open(output, 'w') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+    async with contextlib.AsyncExitStack() as stack:
+        # Prepare the checkpoint, resuming the previous run if requested.
+        checkpoint = Checkpoint.for_output(output, limit, resume=resume)
+        stack.push(lambda exc_type, *_: checkpoint.close(complete=exc_type is None))
+        checkpoint.start(params)
 
-        # Search Yelp.
-        while True:
-            search_results = yelp_api.search_query(**params)
+        # Prepare the output and the resources of the run.
+        writer = open_writer(stack, output, output_format, append=checkpoint.resumed, **(writer_options or {}))
+        resources = await open_resources(stack, **kwargs)
 
-            # Check whether we need to process further or not.
-            if not search_results:
-                break
-            if not search_results['businesses']:
-                break
-            if (params['offset'] / params['limit']) >= pages > 0:
-                break
+        # Prepare the pipeline digging deeper into each business found.
+        async def process(item):
+            counter, business = item
+            return business, await parse_entry(business, counter, resources)
 
-            # Process the results.
-            tasks = [
-                deep_entry_parsing(business, params['offset'] + i)
-                for i, business in enumerate(search_results['businesses'])
-            ]
-            page_results = await asyncio.gather(*tasks)
+        pipeline = Pipeline(process, workers=workers, queue_size=queue_size, ordered=ordered)
 
-            # Write the entries to the file and flush.
-            for entry in page_results:
-                writer.writerow(dataclasses.asdict(entry))
-            csvfile.flush()
-
-            # Update the offset before looping again.
-            params['offset'] += params['limit']
+        # Search Yelp and write the entries as soon as they are complete. The businesses are only committed to the
+        # checkpoint once their entry is flushed.
+        source = search_businesses(resources.yelp_api, params, pages, checkpoint)
+        async for business, entry in pipeline.stream(source):
+            if entry is None:
+                checkpoint.commit(business)
+            else:
+                await writer.write(entry_row(entry), functools.partial(checkpoint.commit, business))
 
 
-def deep_query(terms, location, offset, limit, radius, output, pages):
+def deep_query(terms, location, offset, limit, radius, output, pages, **kwargs):
     """."""
     asyncio.run(
-        async_deep_query(terms, location, offset=offset, limit=limit, radius=radius, output=output, pages=pages))
+        async_deep_query(terms,
+                         location,
+                         offset=offset,
+                         limit=limit,
+                         radius=radius,
+                         output=output,
+                         pages=pages,
+                         **kwargs))